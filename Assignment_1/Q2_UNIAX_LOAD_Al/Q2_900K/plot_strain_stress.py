@@ -1,32 +1,40 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy.signal import savgol_filter
 from scipy.stats import linregress
 
+# binary_cache.py, lammps_io.py, mechanics.py and smoothing.py live in the Assignment_1 folder
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from binary_cache import cached_columns
+from lammps_io import read_columns
+from mechanics import mechanical_properties
+from smoothing import savgol
+
 # ----------------------- Data Loading & Preparation ---------------------------
-# Load the CSV file
-file_path = "data.csv"  # Update with your CSV file path
-df = pd.read_csv(file_path)
+# Load the fix print output of the run (columns as in md.in: p1 p2 p3 p4)
+file_path = "Al_SC_900.def1.txt"  # Update with your fix print file path
+data = cached_columns(file_path, read_columns, names=["Strain", "-pxx/10000", "-pyy/10000", "-pzz/10000"])
 
 # Extract relevant columns
-strain = df["Strain"]
-stress = df["-pxx/10000"]
+strain = data["Strain"]
+stress = data["-pxx/10000"]
 
 # Apply Savitzky-Golay smoothing to reduce noise
-smoothed_stress = savgol_filter(
+smoothed_stress = savgol(
     stress,
-    window_length=15,
-    polyorder=3
+    window=15,
+    order=3
 )
 
 # ----------------------- Elastic Region Analysis ------------------------------
-# Fit linear regression to the initial elastic region (indices 0 to 140)
-elastic_end_idx = 90
+# Linear regime found automatically (sliding-window slope / R^2 scan) and fitted
+properties = mechanical_properties(strain, smoothed_stress)
+elastic_end_idx = properties["elastic_end"]
 elastic_strain = strain[:elastic_end_idx + 1]
-elastic_stress = smoothed_stress[:elastic_end_idx + 1]
 
-slope, intercept = np.polyfit(elastic_strain, elastic_stress, 1)
+slope, intercept = properties["modulus"], properties["intercept"]
 linear_model = np.poly1d([slope, intercept])
 fitted_stress = linear_model(elastic_strain)
 
@@ -34,14 +42,10 @@ fitted_stress = linear_model(elastic_strain)
 elastic_strain_shifted = elastic_strain + 0.002
 
 # ----------------------- Yield Point Determination ---------------------------
-# Find yield point as the intersection beyond elastic region
-post_elastic_stress = smoothed_stress[elastic_end_idx:]
-post_elastic_fit = fitted_stress[elastic_end_idx:]
-
-deviation = np.abs(post_elastic_stress - post_elastic_fit)
-yield_idx = np.argmin(deviation) + elastic_end_idx  # Absolute index
-yield_stress = smoothed_stress[yield_idx]
-yield_strain = strain[yield_idx]
+# 0.2% offset yield point, interpolated between samples
+yield_idx = properties["yield_index"]
+yield_strain = properties["yield_strain"]
+yield_stress = properties["yield_stress"]
 
 print(
     f"Yield Point Index: {yield_idx}\n"
@@ -77,14 +81,14 @@ plt.plot(
 # Highlight elastic and plastic regions
 plt.axvspan(
     0,
-    strain[elastic_end_idx + 1],
+    properties["elastic_boundary"],
     color='lightgreen',
     alpha=0.3,
     label="Elastic Region"
 )
 plt.axvspan(
-    strain[elastic_end_idx + 1],
-    strain.iloc[-1],
+    properties["elastic_boundary"],
+    strain[-1],
     color='lightcoral',
     alpha=0.3,
     label="Plastic Region"
@@ -1,28 +1,30 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy.signal import savgol_filter
+
+# tensile_batch.py (with binary_cache.py, lammps_io.py and mechanics.py) lives in the Assignment_1 folder
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from tensile_batch import find_runs, print_table, properties_table, write_table
 
 # ----------------------- Data Loading & Preparation ---------------------------
-# Function to load and process data
-
-def load_and_process(file_path):
-    df = pd.read_csv(file_path)
-    strain = df["Strain"]
-    stress = df["-pxx/10000"]
-    smoothed_stress = savgol_filter(stress, window_length=15, polyorder=3)
-    return strain, smoothed_stress
-
-# Load data for different temperatures
-file_paths = {
-    "300K": "data_300.csv",
-    "600K": "data_600.csv",
-    "900K": "data_900.csv"
+# Every run in the sibling Q2_*K folders, each read once (a few runs: no process
+# pool needed here; tensile_batch.py on the command line spreads large sweeps)
+runs_root = Path(__file__).resolve().parents[1]
+results = properties_table(find_runs(runs_root), keep_curves=True, processes=1)
+
+# Consolidated table of E, yield point and UTS per temperature
+rows = [row for row, _ in results]
+print_table(rows)
+write_table(rows, "properties.csv")
+
+# Store data (smoothed curves, labelled by temperature)
+data = {
+    f"{row['temperature']:g}K" if row["temperature"] is not None else Path(row["file"]).stem: curve
+    for row, curve in results if curve is not None
 }
 
-# Store data
-data = {label: load_and_process(path) for label, path in file_paths.items()}
-
 # ----------------------- Plotting ---------------------------
 plt.figure(figsize=(9, 5), dpi=120)
 plt.title("Stress-Strain Curves for Different Temperatures", fontsize=14, pad=20)
@@ -37,7 +39,7 @@ for label, (strain, smoothed_stress) in data.items():
         smoothed_stress,
         linestyle='-',
         linewidth=2,
-        color=colors[label],
+        color=colors.get(label),
         label=f"{label}"
     )
 
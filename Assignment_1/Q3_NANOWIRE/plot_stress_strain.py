@@ -1,28 +1,35 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.signal import savgol_filter
+
+# binary_cache.py, lammps_io.py, mechanics.py and smoothing.py live in the Assignment_1 folder
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from binary_cache import cached_columns
+from lammps_io import read_csv_columns
+from mechanics import mechanical_properties
+from smoothing import savgol
 
 # ----------------------- Data Loading & Preparation ---------------------------
-# Load CSV file
+# Load CSV file (parsed once, then memory-mapped from the binary cache)
 csv_file = "deform/stress_strain.csv"
-df = pd.read_csv(csv_file)
+data = cached_columns(csv_file, read_csv_columns)
 
 # Extract relevant columns
-strain = df["v_strain"]
-stress = df["von_mises_stress"]
+strain = data["v_strain"]
+stress = data["von_mises_stress"]
 
 # Apply Savitzky-Golay smoothing to reduce noise
-smoothed_stress = savgol_filter(stress, window_length=101, polyorder=3)
+smoothed_stress = savgol(stress, window=101, order=3)
 
 # ----------------------- Elastic Region Analysis ------------------------------
-# Define elastic region limit
-elastic_end_idx = 5963
+# Linear regime found automatically (sliding-window slope / R^2 scan) and fitted
+properties = mechanical_properties(strain, smoothed_stress)
+elastic_end_idx = properties["elastic_end"]
 elastic_strain = strain[:elastic_end_idx + 1]
-elastic_stress = stress[:elastic_end_idx + 1]
 
-# Perform linear regression
-slope, intercept = np.polyfit(elastic_strain, elastic_stress, 1)
+slope, intercept = properties["modulus"], properties["intercept"]
 linear_model = np.poly1d([slope, intercept])
 fitted_stress = linear_model(elastic_strain)
 
@@ -32,22 +39,15 @@ elastic_modulus = slope  # GPa
 # ----------------------- Yield Point Determination ---------------------------
 # Define 0.2% offset line
 offset = 0.002
-all_strain_for_offset = np.array(strain)
-offset_line = linear_model(all_strain_for_offset - offset)
-
-# Locate yield point (intersection of stress-strain curve with offset line)
-stress_after_elastic = np.array(stress[elastic_end_idx:])
-offset_line_after_elastic = offset_line[elastic_end_idx:]
-differences = stress_after_elastic - offset_line_after_elastic
-crossings = np.where(differences > 0)[0]
-
-if crossings.size > 0:
-    crossing_idx = crossings[0] + elastic_end_idx
-    yield_strain = strain[crossing_idx]
-    yield_stress = stress[crossing_idx]
-    print("hi")
+offset_line = linear_model(np.asarray(strain) - offset)
+
+# Yield point: where the smoothed curve drops below the offset line (interpolated
+# between samples); E and the offset line come from the smoothed curve as well
+if properties["yield_index"] is not None:
+    crossing_idx = properties["yield_index"]
+    yield_strain, yield_stress = properties["yield_strain"], properties["yield_stress"]
 else:
-    crossing_idx, yield_strain, yield_stress = len(strain) - 1, strain.iloc[-1], stress.iloc[-1]
+    crossing_idx, yield_strain, yield_stress = len(strain) - 1, strain[-1], smoothed_stress[-1]
 
 # Display results
 print(
@@ -66,8 +66,8 @@ plt.plot(strain, stress, 'o', markersize=2, color='blue', alpha=0.5, label='Raw
 plt.plot(strain, smoothed_stress, '-', linewidth=2, color='red', label='Smoothed Data', zorder=2)
 
 # Highlight elastic and plastic regions
-plt.axvspan(0, strain[elastic_end_idx + 1], color='lightgreen', alpha=0.3, label="Elastic Region")
-plt.axvspan(strain[elastic_end_idx + 1], strain.iloc[-1], color='lightcoral', alpha=0.3, label="Plastic Region")
+plt.axvspan(0, properties["elastic_boundary"], color='lightgreen', alpha=0.3, label="Elastic Region")
+plt.axvspan(properties["elastic_boundary"], strain[-1], color='lightcoral', alpha=0.3, label="Plastic Region")
 
 # Plot elastic linear fit
 plt.plot(elastic_strain, fitted_stress, '--', color='green', linewidth=1.5, label=f'Linear Fit (E = {elastic_modulus:.2f})')
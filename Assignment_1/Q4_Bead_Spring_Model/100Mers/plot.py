@@ -1,16 +1,27 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import numpy as np
 from scipy.stats import linregress
 
-# ----------------------- Data Loading & Preparation ---------------------------
-# Load the CSV file
-file_path = "msd_data_100.csv"  # Update with your CSV file path
-df = pd.read_csv(file_path)
+# binary_cache.py and lammps_io.py live in the Assignment_1 folder
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from binary_cache import cached_columns
+from lammps_io import read_columns
 
-# Extract relevant columns
-time = df["time"]
-msd = df["msd"]
+# ----------------------- Data Loading & Preparation ---------------------------
+# Load the fix ave/time output (columns named in its header: TimeStep c_1[4])
+# (or, without it, the converted copy committed with the assignment: time,msd)
+file_path = "msd.txt"  # Update with your fix ave/time file path
+if Path(file_path).exists():
+    data = cached_columns(file_path, read_columns)
+
+    # Extract relevant columns
+    time = data["TimeStep"]
+    msd = data["c_1[4]"]
+else:
+    time, msd = np.loadtxt("msd_data_100.csv", delimiter=",", skiprows=1, unpack=True)
 
 # ----------------------- Perform Linear Fit in the Middle Region ---------------------------
 # Define the middle region for fitting (adjust indices as needed)
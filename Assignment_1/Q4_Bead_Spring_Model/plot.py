@@ -1,16 +1,26 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+# binary_cache.py and lammps_io.py live in the Assignment_1 folder
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from binary_cache import cached_columns
+from lammps_io import read_columns
+
 # ----------------------- Data Loading & Preparation ---------------------------
-# Load the CSV file
+# Load the fix ave/time output of a run (or, without it, the converted copy
+# committed with the assignment: time,msd)
 def load_data(n):
-    file_path = f"{n}Mers/msd_data_{n}.csv"  # Update with your CSV file path
-    df = pd.read_csv(file_path)
+    file_path = f"{n}Mers/msd.txt"  # Update with your fix ave/time file path
+    if not Path(file_path).exists():
+        return np.loadtxt(f"{n}Mers/msd_data_{n}.csv", delimiter=",", skiprows=1, unpack=True)
+    data = cached_columns(file_path, read_columns)
 
     # Extract relevant columns
-    time = df["time"]
-    msd = df["msd"]
+    time = data["TimeStep"]
+    msd = data["c_1[4]"]
 
     return time,msd
 
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+# Binary cache for parsed simulation outputs. The columns a loader returns are
+# stored once as .npy files next to the source, in
+#     <source dir>/.column_cache/<source name>.<key>/
+# together with a small header.json recording the source's size, mtime and
+# content hash. Later loads memory-map the .npy files (no parsing, no copy).
+#
+# The cache is rebuilt when the source's size changes, or when its mtime
+# changes and its content hash does too (a touched or copied file whose bytes
+# are the same only gets its stamp refreshed).
+
+# Constants
+cache_dir_name = ".column_cache"
+hash_chunk = 1 << 24  # Bytes read at a time when hashing a source
+FORMAT_VERSION = 1
+
+# ----------------------- Source Fingerprints ----------------------------------
+def source_stamp(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def content_hash(path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while block := f.read(hash_chunk):
+            digest.update(block)
+    return digest.hexdigest()
+
+# ----------------------- Cache Entries ----------------------------------------
+# Identifies what produced the columns: the loader and the arguments it was given
+def loader_key(loader, kwargs):
+    name = f"{loader.__module__}.{loader.__qualname__}"
+    if kwargs:
+        name += json.dumps(kwargs, sort_keys=True, default=str)
+    return name
+
+def cache_location(path, key):
+    path = Path(path)
+    tag = hashlib.blake2b(key.encode(), digest_size=6).hexdigest()
+    return path.parent / cache_dir_name / f"{path.name}.{tag}"
+
+def read_entry(location, key):
+    try:
+        with open(location / "header.json") as f:
+            header = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if header.get("version") != FORMAT_VERSION or header.get("key") != key:
+        return None
+    return header
+
+def write_header(location, header):
+    tmp = location / "header.json.tmp"
+    with open(tmp, "w") as f:
+        json.dump(header, f, indent=1)
+    os.replace(tmp, location / "header.json")
+
+def store(location, key, columns, stamp, digest):
+    location.mkdir(parents=True, exist_ok=True)
+    # The header goes last: an entry without one is never read
+    (location / "header.json").unlink(missing_ok=True)
+    files = []
+    for k, values in enumerate(columns.values()):
+        files.append(f"col{k}.npy")
+        np.save(location / files[-1], np.ascontiguousarray(values))
+    write_header(location, {"version": FORMAT_VERSION, "key": key, **stamp, "hash": digest,
+                            "names": list(columns), "files": files})
+
+def load_entry(location, header):
+    return {name: np.load(location / file, mmap_mode="r")
+            for name, file in zip(header["names"], header["files"])}
+
+def cached_columns(path, loader, **kwargs):
+    """
+    loader(path, **kwargs) -> {column name: 1D array}, e.g. lammps_io.read_columns
+
+    Returns: the loader's columns as read-only memory-mapped arrays, parsed
+             from the source only when no valid cache entry exists. If the
+             cache cannot be written (read-only directory), the freshly
+             parsed columns are returned instead.
+    """
+    key = loader_key(loader, kwargs)
+    location = cache_location(path, key)
+    stamp = source_stamp(path)
+
+    header = read_entry(location, key)
+    if header is not None and header["size"] == stamp["size"]:
+        if header["mtime_ns"] == stamp["mtime_ns"]:
+            return load_entry(location, header)
+        if header["hash"] == content_hash(path):
+            try:  # same content, new mtime (checkout, touch): refresh the stamp if we can
+                write_header(location, {**header, **stamp})
+            except OSError:
+                pass
+            return load_entry(location, header)
+
+    digest = content_hash(path)
+    columns = loader(path, **kwargs)
+    try:
+        store(location, key, columns, stamp, digest)
+    except OSError:
+        return columns
+    return load_entry(location, read_entry(location, key))
@@ -0,0 +1,434 @@
+import glob
+import hashlib
+import json
+import mmap
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+
+from binary_cache import cache_dir_name, source_stamp
+from lammps_io import chunk_bytes, parse_numbers
+
+# Random-access reader for LAMMPS dump files:
+#   native text dumps  (dump atom / dump custom: "ITEM: TIMESTEP" ... "ITEM: ATOMS id type ...")
+#   extended CFG       (dump cfg: one frame per file, "Number of particles = N")
+#
+# The first open scans every file once for the byte offsets of its frames
+# (a C-level search for "ITEM: TIMESTEP", atom lines are never split) and
+# stores that index next to the dump. Reading frame k then seeks straight to
+# its atom block and parses it in one numpy call (or, for very large frames,
+# in line-aligned chunks through stream_frame). A dump that has grown since
+# it was indexed (a run still writing it) only has its new tail scanned.
+
+# Constants
+head_bytes = 1 << 16  # Bytes hashed to recognise a file that was rewritten, not appended to
+INDEX_VERSION = 1
+
+INTEGER_COLUMNS = {"id", "type", "mol", "proc", "procp1", "ix", "iy", "iz", "element"}
+TIMESTEP_ITEM = b"ITEM: TIMESTEP"
+
+# ----------------------- Frames -----------------------------------------------
+class Frame:
+    """
+    timestep: MD step of the snapshot
+    atoms: structured array with one field per dump column
+    origin, cell: box corner (3,) and cell vectors as rows (3, 3)
+    boundary: LAMMPS boundary flags, e.g. "pp pp pp"
+    elements: element names by type (cfg dumps with dump_modify element)
+    blocks: for a streamed frame (atoms is None), an iterator over the atoms
+            as structured arrays of consecutive chunks
+    """
+
+    def __init__(self, timestep, atoms, origin, cell, boundary="pp pp pp", elements=None, blocks=None):
+        self.timestep = timestep
+        self.atoms = atoms
+        self.origin = origin
+        self.cell = cell
+        self.boundary = boundary
+        self.elements = elements
+        self.blocks = blocks
+
+    def __len__(self):
+        return len(self.atoms)
+
+    def __repr__(self):
+        if self.atoms is None:
+            return f"Frame(timestep={self.timestep}, streamed)"
+        return f"Frame(timestep={self.timestep}, natoms={len(self.atoms)}, columns={self.atoms.dtype.names})"
+
+    # Cartesian coordinates (N, 3), from x y z, xu yu zu or scaled xs ys zs columns
+    def positions(self):
+        names = self.atoms.dtype.names
+        for fields in (("x", "y", "z"), ("xu", "yu", "zu")):
+            if all(f in names for f in fields):
+                return np.column_stack([self.atoms[f] for f in fields])
+        for fields in (("xs", "ys", "zs"), ("xsu", "ysu", "zsu")):
+            if all(f in names for f in fields):
+                scaled = np.column_stack([self.atoms[f] for f in fields])
+                return self.origin + scaled @ self.cell
+        raise KeyError(f"no coordinate columns among {names}")
+
+def column_dtype(names):
+    return np.dtype([(name, np.int64 if name in INTEGER_COLUMNS else np.float64) for name in names])
+
+# (n_atoms * n_columns) parsed values -> structured array
+def to_structured(values, names, columns=None):
+    table = values.reshape(-1, len(names))
+    keep = [names.index(c) for c in columns] if columns else range(len(names))
+    atoms = np.empty(len(table), column_dtype([names[k] for k in keep]))
+    for k in keep:
+        atoms[names[k]] = table[:, k]
+    return atoms
+
+# ITEM: BOX BOUNDS lines as (3, 3) [lo, hi, tilt] -> (origin, cell); triclinic
+# bounds are those of the bounding box
+def box_from_bounds(bounds):
+    lo, hi = bounds[:, 0].copy(), bounds[:, 1].copy()
+    xy, xz, yz = bounds[:, 2]
+    lo[0] -= min(0.0, xy, xz, xy + xz)
+    hi[0] -= max(0.0, xy, xz, xy + xz)
+    lo[1] -= min(0.0, yz)
+    hi[1] -= max(0.0, yz)
+    length = hi - lo
+    cell = np.array([[length[0], 0.0, 0.0], [xy, length[1], 0.0], [xz, yz, length[2]]])
+    return lo, cell
+
+# ----------------------- Native Dumps -----------------------------------------
+def parse_native_header(text):
+    """
+    text: bytes from "ITEM: TIMESTEP" up to and including the ITEM: ATOMS line
+
+    Returns: (timestep, natoms, bounds (3, 2 or 3), boundary, column names)
+    """
+    lines = text.decode().splitlines()
+    timestep = int(lines[1])
+    natoms = int(lines[3])
+    box_item = lines[4].split()[3:]
+    boundary = " ".join(box_item[-3:])
+    bounds = np.array([[float(v) for v in line.split()] for line in lines[5:8]])
+    names = lines[8].split()[2:]
+    return timestep, natoms, bounds, boundary, names
+
+def scan_native(buffer, start=0):
+    """
+    Frame offsets of a native dump held in `buffer` (mmap or bytes), from
+    byte `start` on. A last frame whose atom block is not complete yet (the
+    run is still writing it) is left out.
+
+    Returns: (dict of per-frame arrays, column names, boundary flags)
+    """
+    frames = {"offset": [], "data_start": [], "data_end": [], "timestep": [], "natoms": [], "bounds": []}
+    names, boundary = None, None
+    pos = buffer.find(TIMESTEP_ITEM, start)
+    while pos != -1:
+        atoms_item = buffer.find(b"ITEM: ATOMS", pos)
+        header_end = buffer.find(b"\n", atoms_item) + 1 if atoms_item != -1 else 0
+        if header_end == 0:
+            break
+        timestep, natoms, bounds, boundary, frame_names = parse_native_header(buffer[pos:header_end])
+        if names is None:
+            names = frame_names
+        elif frame_names != names:
+            raise ValueError(f"dump columns change from {names} to {frame_names} at step {timestep}")
+
+        following = buffer.find(TIMESTEP_ITEM, header_end)
+        data_end = following if following != -1 else len(buffer)
+        if following == -1 and buffer[header_end:data_end].count(b"\n") < natoms:
+            break
+
+        # orthogonal boxes get zero tilt factors
+        tilted = np.zeros((3, 3))
+        tilted[:, :bounds.shape[1]] = bounds
+        for key, value in zip(frames, (pos, header_end, data_end, timestep, natoms, tilted)):
+            frames[key].append(value)
+        pos = following
+
+    arrays = {key: np.array(values, dtype=np.int64) for key, values in frames.items() if key != "bounds"}
+    arrays["bounds"] = np.array(frames["bounds"]).reshape(-1, 3, 3)
+    return arrays, names, boundary
+
+# ----------------------- CFG Dumps --------------------------------------------
+CFG_ENTRY = re.compile(r"^\s*([^=]+?)\s*=\s*(\S+)")
+
+def parse_cfg_header(text):
+    """
+    Returns: (natoms, scale, H (3, 3), column names, header length in bytes)
+    """
+    natoms, scale, H = None, 1.0, np.zeros((3, 3))
+    velocities = True
+    aux = {}
+    length = 0
+    for line in text.splitlines(keepends=True):
+        stripped = line.decode().strip()
+        match = CFG_ENTRY.match(stripped)
+        if stripped == ".NO_VELOCITY.":
+            velocities = False
+        elif match:
+            key, value = match.groups()
+            if key == "Number of particles":
+                natoms = int(value)
+            elif key == "A":
+                scale = float(value)
+            elif key.startswith("H0("):
+                i, j = (int(v) - 1 for v in key[3:-1].split(","))
+                H[i, j] = float(value)
+            elif key.startswith("auxiliary["):
+                aux[int(key[10:-1])] = value
+        elif stripped and not stripped.startswith("#"):
+            break
+        length += len(line)
+    names = ["xs", "ys", "zs"] + (["vx", "vy", "vz"] if velocities else []) + [aux[k] for k in sorted(aux)]
+    return natoms, scale, H, names, length
+
+# Per-type blocks of a cfg body: "mass\nElement\n" followed by the rows of that type
+CFG_BLOCK = re.compile(rb"^[ \t]*(\S+)[ \t]*\r?\n[ \t]*([A-Za-z][A-Za-z0-9_]*)[ \t]*\r?$", re.M)
+
+def parse_cfg_body(body, names, columns=None):
+    blocks = list(CFG_BLOCK.finditer(body))
+    if not blocks:
+        return to_structured(parse_numbers(body), names, columns), None
+
+    pieces, types, masses, elements = [], [], [], []
+    for t, block in enumerate(blocks):
+        stop = blocks[t + 1].start() if t + 1 < len(blocks) else len(body)
+        values = parse_numbers(body[block.end():stop])
+        atoms = to_structured(values, names, columns)
+        pieces.append(atoms)
+        types.append(np.full(len(atoms), t + 1))
+        masses.append(np.full(len(atoms), float(block.group(1))))
+        elements.append(block.group(2).decode())
+
+    data = np.concatenate(pieces)
+    atoms = np.empty(len(data), np.dtype([("type", np.int64), ("mass", np.float64)] + data.dtype.descr))
+    atoms["type"], atoms["mass"] = np.concatenate(types), np.concatenate(masses)
+    for name in data.dtype.names:
+        atoms[name] = data[name]
+    return atoms, elements
+
+# LAMMPS replaces the * of a cfg dump name by the timestep
+def timestep_from_name(path):
+    numbers = re.findall(r"\d+", Path(path).name)
+    return int(numbers[-1]) if numbers else 0
+
+# ----------------------- Persistent Index -------------------------------------
+def index_location(path):
+    path = Path(path)
+    return path.parent / cache_dir_name / f"{path.name}.frames.npz"
+
+def head_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(head_bytes), digest_size=16).hexdigest()
+
+def load_index(path):
+    try:
+        with np.load(index_location(path)) as stored:
+            arrays = {key: stored[key] for key in stored.files}
+    except (OSError, ValueError):
+        return None
+    meta = json.loads(str(arrays.pop("meta")))
+    return (arrays, meta) if meta.get("version") == INDEX_VERSION else None
+
+def save_index(path, arrays, meta):
+    location = index_location(path)
+    try:
+        location.parent.mkdir(parents=True, exist_ok=True)
+        tmp = location.with_suffix(".tmp.npz")
+        np.savez(tmp, meta=json.dumps(meta), **arrays)
+        os.replace(tmp, location)
+    except OSError:
+        pass  # read-only directory: the index is simply rebuilt next time
+
+# The rescan starts at the last indexed frame, so that one is replaced by its rescan
+def append_frames(old, new):
+    return {key: np.concatenate([old[key][:-1], new[key]]) for key in old}
+
+def index_native(path, buffer):
+    """
+    Frame index of one native dump, reusing (and extending) the stored one
+    when the file is unchanged or has only been appended to.
+    """
+    stamp = source_stamp(path)
+    stored = load_index(path)
+    if stored is not None:
+        arrays, meta = stored
+        if meta["size"] == stamp["size"] and meta["mtime_ns"] == stamp["mtime_ns"]:
+            return arrays, meta
+        if stamp["size"] >= meta["size"] and meta["head"] == head_hash(path) and len(arrays["offset"]):
+            # rescan from the last indexed frame: it may have been incomplete
+            new, names, boundary = scan_native(buffer, int(arrays["offset"][-1]))
+            if names == meta["names"] and len(new["offset"]):
+                arrays = append_frames(arrays, new)
+                meta.update(stamp)
+                save_index(path, arrays, meta)
+                return arrays, meta
+
+    arrays, names, boundary = scan_native(buffer)
+    meta = {"version": INDEX_VERSION, **stamp, "head": head_hash(path), "names": names, "boundary": boundary}
+    save_index(path, arrays, meta)
+    return arrays, meta
+
+# ----------------------- Reader -----------------------------------------------
+class DumpReader:
+    """
+    Random access to the frames of one or more dump files.
+
+    paths: a file, a glob pattern (e.g. "dump.tensile_*.cfg") or a list of
+           files; files are taken in natural order, frames in file order
+    use_mmap: read atom blocks through a memory map instead of seek + read
+
+    reader[k] is frame k (negative k counts from the end), len(reader) the
+    number of frames and reader.timesteps their MD steps.
+    """
+
+    def __init__(self, paths, use_mmap=True):
+        if isinstance(paths, (str, Path)):
+            found = glob.glob(str(paths)) if glob.has_magic(str(paths)) else [str(paths)]
+            paths = sorted(found, key=lambda p: [int(t) if t.isdigit() else t for t in re.split(r"(\d+)", p)])
+        if not paths:
+            raise FileNotFoundError("no dump files given / matched")
+        self.paths = [str(p) for p in paths]
+        self.use_mmap = use_mmap
+        self.maps = {}
+        self.files = []
+
+        file_no, data_start, data_end, timesteps, natoms, origins, cells = [], [], [], [], [], [], []
+        for k, path in enumerate(self.paths):
+            info = self.index_file(path)
+            self.files.append(info)
+            n = len(info["timestep"])
+            file_no += [k] * n
+            data_start.append(info["data_start"])
+            data_end.append(info["data_end"])
+            timesteps.append(info["timestep"])
+            natoms.append(info["natoms"])
+            origins.append(info["origin"])
+            cells.append(info["cell"])
+
+        self.file_no = np.array(file_no, dtype=np.int64)
+        self.data_start = np.concatenate(data_start)
+        self.data_end = np.concatenate(data_end)
+        self.timesteps = np.concatenate(timesteps)
+        self.natoms = np.concatenate(natoms)
+        self.origins = np.concatenate(origins)
+        self.cells = np.concatenate(cells)
+
+    def index_file(self, path):
+        with open(path, "rb") as f:
+            start = f.read(len(TIMESTEP_ITEM))
+            if start == TIMESTEP_ITEM:
+                return self.index_native_file(path)
+            f.seek(0)
+            head = f.read(head_bytes)
+        if head.lstrip().startswith(b"Number of particles"):
+            natoms, scale, H, names, length = parse_cfg_header(head)
+            return {"kind": "cfg", "names": names, "boundary": "pp pp pp",
+                    "data_start": np.array([length]), "data_end": np.array([os.path.getsize(path)]),
+                    "timestep": np.array([timestep_from_name(path)]), "natoms": np.array([natoms]),
+                    "origin": np.zeros((1, 3)), "cell": (scale * H)[None]}
+        raise ValueError(f"{path} is neither a native LAMMPS dump nor a cfg file")
+
+    def index_native_file(self, path):
+        buffer = self.buffer(path)
+        arrays, meta = index_native(path, buffer)
+        boxes = [box_from_bounds(b) for b in arrays["bounds"]]
+        return {"kind": "native", "names": meta["names"], "boundary": meta["boundary"],
+                "data_start": arrays["data_start"], "data_end": arrays["data_end"],
+                "timestep": arrays["timestep"], "natoms": arrays["natoms"],
+                "origin": np.array([b[0] for b in boxes]).reshape(-1, 3),
+                "cell": np.array([b[1] for b in boxes]).reshape(-1, 3, 3)}
+
+    def buffer(self, path):
+        if path not in self.maps:
+            with open(path, "rb") as f:
+                self.maps[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b""
+        return self.maps[path]
+
+    def read_bytes(self, k, start=None, end=None):
+        path = self.paths[self.file_no[k]]
+        start = int(self.data_start[k]) if start is None else start
+        end = int(self.data_end[k]) if end is None else end
+        if self.use_mmap:
+            return self.buffer(path)[start:end]
+        with open(path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    def __len__(self):
+        return len(self.timesteps)
+
+    def __getitem__(self, k):
+        return self.read_frame(k)
+
+    def __iter__(self):
+        return (self.read_frame(k) for k in range(len(self)))
+
+    def read_frame(self, k, columns=None):
+        """
+        columns: subset of the dump columns to keep (default: all)
+
+        Returns: Frame k
+        """
+        k = range(len(self))[k]
+        info = self.files[self.file_no[k]]
+        body = self.read_bytes(k)
+        elements = None
+        if info["kind"] == "cfg":
+            atoms, elements = parse_cfg_body(body, info["names"], columns)
+        else:
+            values = parse_numbers(body)
+            if values.size != self.natoms[k] * len(info["names"]):
+                raise ValueError(f"frame {k} (step {self.timesteps[k]}) has {values.size} values, "
+                                 f"expected {self.natoms[k]} atoms x {len(info['names'])} columns")
+            atoms = to_structured(values, info["names"], columns)
+        return Frame(int(self.timesteps[k]), atoms, self.origins[k], self.cells[k], info["boundary"], elements)
+
+    def stream_frame(self, k, columns=None, chunk_bytes=chunk_bytes):
+        """
+        Frame k without parsing its atoms up front: frame.blocks yields them
+        in line-aligned chunks of about chunk_bytes of text, so a frame with
+        millions of atoms is never held as one parsed array (a cfg frame
+        comes as a single block).
+
+        Returns: Frame with atoms None and blocks set
+        """
+        k = range(len(self))[k]
+        info = self.files[self.file_no[k]]
+        if info["kind"] == "cfg":
+            frame = self.read_frame(k, columns)
+            frame.blocks, frame.atoms = iter([frame.atoms]), None
+            return frame
+        return Frame(int(self.timesteps[k]), None, self.origins[k], self.cells[k], info["boundary"],
+                     blocks=self.iter_native_blocks(k, info["names"], columns, chunk_bytes))
+
+    def iter_native_blocks(self, k, names, columns, chunk_bytes):
+        pos, end = int(self.data_start[k]), int(self.data_end[k])
+        rows = 0
+        while pos < end:
+            text = self.read_bytes(k, pos, min(pos + chunk_bytes, end))
+            cut = text.rfind(b"\n") + 1 if pos + len(text) < end else len(text)
+            if cut == 0:  # a line longer than chunk_bytes: take the rest of the frame
+                text = self.read_bytes(k, pos, end)
+                cut = len(text)
+            values = parse_numbers(text[:cut])
+            if values.size % len(names):
+                raise ValueError(f"frame {k} (step {self.timesteps[k]}) has a line without {len(names)} columns")
+            pos += cut
+            rows += values.size // len(names)
+            if values.size:
+                yield to_structured(values, names, columns)
+        if rows != self.natoms[k]:
+            raise ValueError(f"frame {k} (step {self.timesteps[k]}) has {rows} atoms, expected {self.natoms[k]}")
+
+    def close(self):
+        for buffer in self.maps.values():
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+        self.maps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
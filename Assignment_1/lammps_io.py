@@ -0,0 +1,222 @@
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+# Readers for the text files LAMMPS writes during a run. Files are parsed in
+# fixed-size chunks straight into float64 arrays, so multi-GB outputs never
+# go through Python-level line splitting or an intermediate CSV.
+#
+# fix print       "# Fix print output for fix ID" (or the `title` line), then
+#                 one row of values per print
+# fix ave/time    "# Time-averaged data for fix ID" + "# TimeStep name1 ...",
+#                 then one row per output step
+#                 (mode vector: "# TimeStep Number-of-rows" + "# Row name1 ...",
+#                 then blocks of "step n_rows" followed by n_rows rows)
+
+# Constants
+chunk_bytes = 1 << 24  # Bytes of text parsed per chunk (16 MB)
+
+PRINT_HEADER = re.compile(rb"#\s*Fix print output for fix (\S+)")
+AVE_TIME_HEADER = re.compile(rb"#\s*Time-averaged data for fix (\S+)")
+
+# ----------------------- Headers ----------------------------------------------
+class Header:
+    """
+    kind: "print", "ave/time", "ave/time vector" or "unknown"
+    fix_id: ID of the fix that wrote the file (None if unknown)
+    names: column names of the data rows
+    data_offset: byte offset of the first data line
+    """
+
+    def __init__(self, kind, fix_id, names, data_offset):
+        self.kind = kind
+        self.fix_id = fix_id
+        self.names = names
+        self.data_offset = data_offset
+
+    def __repr__(self):
+        return f"Header({self.kind}, fix={self.fix_id}, names={self.names})"
+
+def read_header(path):
+    """
+    Parses the leading comment lines of a fix print / fix ave/time file.
+
+    Returns: Header. Columns the comments do not name are called
+             "ID[1]", "ID[2]", ... after the fix (LAMMPS' own convention for
+             fix vector outputs), or "c1", "c2", ... if the fix is unknown.
+    """
+    comments = []
+    with open(path, "rb") as f:
+        line = f.readline()
+        while line.startswith(b"#"):
+            comments.append(line.rstrip())
+            data_offset = f.tell()
+            line = f.readline()
+        if not comments:
+            data_offset = 0
+        n_columns = len(line.split())
+
+    kind, fix_id, names = "unknown", None, None
+    if comments and (match := PRINT_HEADER.match(comments[0])):
+        kind, fix_id = "print", match.group(1).decode()
+    elif comments and (match := AVE_TIME_HEADER.match(comments[0])):
+        kind, fix_id = "ave/time", match.group(1).decode()
+        names = comments[1].lstrip(b"#").decode().split() if len(comments) > 1 else None
+        if len(comments) > 2 and names == ["TimeStep", "Number-of-rows"]:
+            kind = "ave/time vector"
+            names = comments[2].lstrip(b"#").decode().split()
+    elif comments:
+        # fix print with a custom `title`: use it when it has one word per column
+        words = comments[-1].lstrip(b"#").decode().split()
+        names = words if len(words) == n_columns else None
+
+    if names is None:
+        prefix = f"{fix_id}[{{}}]" if fix_id else "c{}"
+        names = [prefix.format(k) for k in range(1, n_columns + 1)]
+    return Header(kind, fix_id, names, data_offset)
+
+# ----------------------- Parsing ----------------------------------------------
+# Whitespace-separated numbers -> flat float64 array, converted in one C-level
+# pass (no Python object per number); malformed text raises ValueError
+def parse_numbers(text):
+    if not text.strip():  # fromstring reads blank text as [-1.0]
+        return np.empty(0)
+    return np.fromstring(text, dtype=np.float64, sep=" ")
+
+# Whitespace-separated numbers of complete lines -> flat float64 array
+def parse_values(text):
+    if b"#" in text:
+        # Comment lines inside the data, e.g. a second header from an appended run
+        text = b"\n".join(line for line in text.split(b"\n") if not line.lstrip().startswith(b"#"))
+    return parse_numbers(text)
+
+def iter_text_chunks(path, offset=0, chunk_bytes=chunk_bytes):
+    """
+    Yields the file from byte `offset` on in pieces of about chunk_bytes that
+    always end on a line break (the last piece ends where the file ends).
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        rest = b""
+        while block := f.read(chunk_bytes):
+            block = rest + block
+            cut = block.rfind(b"\n") + 1
+            rest = block[cut:]
+            if cut:
+                yield block[:cut]
+        if rest.strip():
+            yield rest
+
+def iter_chunks(path, chunk_bytes=chunk_bytes, header=None):
+    """
+    Streams the data rows of a fix print / scalar fix ave/time file.
+
+    Returns: generator of (n_rows, n_columns) float64 arrays
+    """
+    header = header or read_header(path)
+    n_columns = len(header.names)
+    for text in iter_text_chunks(path, header.data_offset, chunk_bytes):
+        values = parse_values(text)
+        if values.size % n_columns:
+            raise ValueError(f"{path}: rows do not all have the {n_columns} columns {header.names}")
+        yield values.reshape(-1, n_columns)
+
+def read_columns(path, names=None, chunk_bytes=chunk_bytes):
+    """
+    Reads a whole fix print / scalar fix ave/time file.
+
+    names: column names to use instead of those found in the header
+
+    Returns: dict {column name: float64 array}, in file column order
+    """
+    header = read_header(path)
+    if names is not None:
+        if len(names) != len(header.names):
+            raise ValueError(f"{path} has {len(header.names)} columns, got {len(names)} names")
+        header.names = list(names)
+    if header.kind == "ave/time vector":
+        raise ValueError(f"{path} is a fix ave/time mode vector file, use read_vector")
+
+    chunks = list(iter_chunks(path, chunk_bytes, header))
+    data = np.concatenate(chunks) if chunks else np.empty((0, len(header.names)))
+    return {name: np.ascontiguousarray(data[:, k]) for k, name in enumerate(header.names)}
+
+def read_vector(path, chunk_bytes=chunk_bytes):
+    """
+    Reads a fix ave/time mode vector file (e.g. an averaged RDF). Every block
+    must have the same number of rows.
+
+    Returns: (timesteps, blocks, names) with blocks of shape
+             (n_blocks, n_rows, len(names))
+    """
+    header = read_header(path)
+    if header.kind != "ave/time vector":
+        raise ValueError(f"{path} is not a fix ave/time mode vector file")
+    values = np.concatenate([parse_values(text) for text in
+                             iter_text_chunks(path, header.data_offset, chunk_bytes)] or [np.empty(0)])
+    if values.size == 0:
+        return np.empty(0), np.empty((0, 0, len(header.names))), header.names
+
+    n_rows = int(values[1])
+    block_size = 2 + n_rows * len(header.names)
+    if values.size % block_size:
+        raise ValueError(f"{path}: blocks do not all have {n_rows} rows")
+    blocks = values.reshape(-1, block_size)
+    return blocks[:, 0].astype(np.int64), blocks[:, 2:].reshape(len(blocks), n_rows, -1), header.names
+
+# ----------------------- Tailing ----------------------------------------------
+# Header of a file whose first data line is complete (None until then)
+def header_when_ready(path):
+    header = read_header(path)
+    with open(path, "rb") as f:
+        f.seek(header.data_offset)
+        first_line = f.read(1 << 16)
+    return header if b"\n" in first_line else None
+
+def follow_rows(path, poll_interval=5.0, idle_timeout=None):
+    """
+    Follows a fix print / scalar fix ave/time file that a running job is
+    still writing. Every poll reads only the bytes added since the last one;
+    a partly written last line waits for the next poll.
+
+    Yields: (header, rows) for every batch of new complete rows, until the
+            file has not grown for idle_timeout seconds (forever if None)
+    """
+    header, offset = None, 0
+    last_growth = time.monotonic()
+    while True:
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size < offset:  # the file was rewritten: start over
+            header, offset = None, 0
+        if header is None and size:
+            header = header_when_ready(path)
+            offset = header.data_offset if header else 0
+
+        grew = False
+        if header is not None and size > offset:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                text = f.read(size - offset)
+            cut = text.rfind(b"\n") + 1
+            if cut:
+                offset += cut
+                values = parse_values(text[:cut])
+                if values.size % len(header.names):
+                    raise ValueError(f"{path}: rows do not all have the {len(header.names)} columns")
+                grew = True
+                if values.size:
+                    yield header, values.reshape(-1, len(header.names))
+
+        if grew:
+            last_growth = time.monotonic()
+        elif idle_timeout is not None and time.monotonic() - last_growth > idle_timeout:
+            return
+        time.sleep(poll_interval)
+
+# CSV with a header row (e.g. a table exported from a run) -> {column name: array}
+def read_csv_columns(path):
+    df = pd.read_csv(path)
+    return {name: df[name].to_numpy() for name in df.columns}
@@ -0,0 +1,183 @@
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+
+from lammps_io import chunk_bytes, iter_text_chunks
+
+# Thermo output of log.lammps, split into one segment per `run`. LAMMPS
+# prints every run's thermo table as
+#     Per MPI rank memory allocation (min/avg/max) = ...
+#        Step  Temp  E_pair ...      <- header (names follow thermo_style)
+#            0   300   -3.36 ...
+#     ...
+#     Loop time of ... on 4 procs for 20000 steps with 4000 atoms
+# so a new thermo_style in a later run simply starts a segment with new
+# columns. The log is parsed in large text blocks; the rows of a block are
+# converted with one numpy call. The same parser tails a log that a running
+# job is still writing (follow_log).
+
+MEMORY_LINE = re.compile(rb"^Per MPI rank memory allocation.*$", re.M)
+LOOP_LINE = re.compile(rb"^Loop time of .*$", re.M)
+HEADER_LINE = re.compile(rb"^[ \t]*\S.*$", re.M)
+TEXT_LINE = re.compile(rb"^[ \t]*[A-Za-z]", re.M)
+NUMERIC_LINE = re.compile(rb"^[ \t]*[-+.\d].*$", re.M)
+FINISHED_LINE = re.compile(rb"^Total wall time", re.M)
+
+INTEGER_KEYWORDS = {"Step", "Elapsed", "Atoms", "Nbuild", "Ndanger"}
+
+# ----------------------- Segments ---------------------------------------------
+class ThermoSegment:
+    """
+    Thermo table of one run.
+
+    names: column names as printed in the header (Step, Temp, v_strain, ...)
+    complete: False while the run has not printed its "Loop time" line
+    segment["Temp"] is a column; Step-like columns are int64, the rest float64
+    """
+
+    def __init__(self, names):
+        self.names = names
+        self.blocks = []
+        self.complete = False
+
+    def append(self, rows):
+        self.blocks.append(rows)
+        if len(self.blocks) > 64:
+            self.blocks = [np.concatenate(self.blocks)]
+
+    @property
+    def data(self):
+        if len(self.blocks) != 1:
+            self.blocks = [np.concatenate(self.blocks) if self.blocks else np.empty((0, len(self.names)))]
+        return self.blocks[0]
+
+    def __len__(self):
+        return sum(len(b) for b in self.blocks)
+
+    def __getitem__(self, name):
+        column = self.data[:, self.names.index(name)]
+        return column.astype(np.int64) if name in INTEGER_KEYWORDS else column
+
+    def columns(self):
+        return {name: self[name] for name in self.names}
+
+    def __repr__(self):
+        return f"ThermoSegment({len(self)} rows, names={self.names}, complete={self.complete})"
+
+# Thermo rows of a text block; warnings and other messages in between are skipped
+def parse_rows(text, n_columns):
+    if TEXT_LINE.search(text):
+        text = b"\n".join(NUMERIC_LINE.findall(text))
+    values = np.array(text.split(), dtype=np.float64)
+    if values.size % n_columns:
+        raise ValueError(f"thermo rows do not all have {n_columns} columns")
+    return values.reshape(-1, n_columns)
+
+# ----------------------- Parser -----------------------------------------------
+class LogParser:
+    """
+    Incremental log.lammps parser: feed() it blocks of complete lines in
+    file order. segments holds every thermo table seen so far.
+    """
+
+    def __init__(self):
+        self.segments = []
+        self.state = "outside"  # "outside", "header" (memory line seen) or "inside" a table
+        self.finished = False
+
+    def feed(self, text):
+        """
+        Returns: list of (segment index, new rows) found in this block
+        """
+        new = []
+        pos = 0
+        while pos < len(text):
+            if self.state == "outside":
+                match = MEMORY_LINE.search(text, pos)
+                if match is None:
+                    break
+                pos, self.state = match.end(), "header"
+            elif self.state == "header":
+                match = HEADER_LINE.search(text, pos)
+                if match is None:
+                    break
+                self.segments.append(ThermoSegment(match.group().decode().split()))
+                pos, self.state = match.end(), "inside"
+            else:
+                segment = self.segments[-1]
+                match = LOOP_LINE.search(text, pos)
+                end = match.start() if match else len(text)
+                rows = parse_rows(text[pos:end], len(segment.names))
+                if len(rows):
+                    segment.append(rows)
+                    new.append((len(self.segments) - 1, rows))
+                if match is None:
+                    break
+                segment.complete = True
+                pos, self.state = match.end(), "outside"
+        if FINISHED_LINE.search(text):
+            self.finished = True
+        return new
+
+def read_log(path, chunk_bytes=chunk_bytes):
+    """
+    Returns: list of ThermoSegment, one per run in the log
+    """
+    parser = LogParser()
+    for text in iter_text_chunks(path, 0, chunk_bytes):
+        parser.feed(text)
+    return parser.segments
+
+# ----------------------- Tailing ----------------------------------------------
+def follow_log(path, poll_interval=5.0, idle_timeout=None, parser=None):
+    """
+    Follows a log that a running job is still writing.
+
+    Yields (segment index, new rows, parser) whenever complete new thermo lines
+    have appended, until LAMMPS prints "Total wall time" or the file has not
+    grown for idle_timeout seconds. Every poll only reads the bytes written
+    since the last one.
+    """
+    parser = parser or LogParser()
+    offset = 0
+    last_growth = time.monotonic()
+    while not parser.finished:
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size < offset:  # the log was restarted: start over
+            parser, offset = LogParser(), 0
+        if size > offset:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                text = f.read(size - offset)
+            cut = text.rfind(b"\n") + 1  # a partly written line waits for the next poll
+            offset += cut
+            for index, rows in parser.feed(text[:cut]):
+                yield index, rows, parser
+            last_growth = time.monotonic()
+        elif idle_timeout is not None and time.monotonic() - last_growth > idle_timeout:
+            return
+        if not parser.finished:
+            time.sleep(poll_interval)
+
+# Main execution
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description="Thermo segments of a LAMMPS log")
+    cli.add_argument("log", nargs="?", default="log.lammps")
+    cli.add_argument("--follow", action="store_true", help="keep printing rows as a running job writes them")
+    cli.add_argument("--poll", type=float, default=5.0, help="seconds between checks when following")
+    args = cli.parse_args()
+
+    if args.follow:
+        for index, rows, parser in follow_log(args.log, args.poll):
+            names = parser.segments[index].names
+            for row in rows:
+                print(f"[run {index}] " + "  ".join(f"{n}={v:.6g}" for n, v in zip(names, row)))
+    else:
+        for index, segment in enumerate(read_log(args.log)):
+            steps = segment["Step"] if "Step" in segment.names else np.arange(len(segment))
+            span = f"steps {steps[0]}-{steps[-1]}" if len(segment) else "no rows"
+            status = "" if segment.complete else " (incomplete)"
+            print(f"run {index}: {len(segment)} rows, {span}{status}\n    {' '.join(segment.names)}")
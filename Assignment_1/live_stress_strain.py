@@ -0,0 +1,227 @@
+import argparse
+import json
+
+import numpy as np
+
+from lammps_io import follow_rows
+from mechanics import first_persistent, line_fits, offset, r2_min, running_sums, slope_tol, window_fits
+from smoothing import StreamingSavgol
+
+# Live stress-strain analysis of a deformation run that is still going, e.g.
+#     python live_stress_strain.py Q2_UNIAX_LOAD_Al/Q2_300K/Al_SC_100.def1.txt --stop-after-uts
+# follows the fix print file (strain, -pxx/10000, ...) as LAMMPS appends to it
+# and keeps the elastic modulus, 0.2% offset yield point and UTS up to date.
+# Once the stress has fallen well below its maximum after yield, both are
+# known and the rest of the run can be skipped.
+# The analysis is the one of mechanics.mechanical_properties on the curve
+# smoothed like tensile_batch.py, done as the rows arrive, so the live
+# results match the offline ones. Every poll costs O(new rows): the
+# smoothing is streamed, the sliding-window fits only cover the new windows
+# and the elastic fit is a set of running sums.
+
+# Constants
+poll_interval = 10.0  # Seconds between looks at the file
+fit_window = 20       # Rows per sliding-window fit (mechanics.default_window of a 2001-row run)
+window_length = 15    # Savitzky-Golay smoothing, as in tensile_batch.py
+polyorder = 3
+uts_drop = 0.1        # The maximum is the UTS once stress falls this fraction below it after yield
+strain_column = 0     # Columns of the fix print file (p1 = strain, p2 = -pxx/10000)
+stress_column = 1
+
+# Arrays that grow by doubling, so appending n rows is O(n) amortized
+class GrowingTable:
+    def __init__(self, n_columns, capacity=1024):
+        self.buffer = np.empty((capacity, n_columns))
+        self.size = 0
+
+    def append(self, rows):
+        needed = self.size + len(rows)
+        if needed > len(self.buffer):
+            grown = np.empty((max(needed, 2 * len(self.buffer)), self.buffer.shape[1]))
+            grown[:self.size] = self.buffer[:self.size]
+            self.buffer = grown
+        self.buffer[self.size:needed] = rows
+        self.size = needed
+
+    def view(self):
+        return self.buffer[:self.size]
+
+class StressStrainMonitor:
+    """
+    Incremental modulus / yield / UTS estimates.
+
+    The stress is smoothed as it arrives (StreamingSavgol), so the analysis
+    trails the file by half a smoothing window. Every new sliding window of
+    `window` rows gets its line fit; the first `window` of them set the
+    initial modulus, and the elastic regime ends where a later window's
+    slope leaves slope_tol of it or its R^2 drops below r2_min (as
+    mechanics.elastic_end). Until then the rows enter a least-squares line
+    (running sums of x, y, x^2, xy); at the end of the regime the fit is
+    frozen over the elastic rows. Yield is the crossing of the offset line
+    E (strain - offset) + b of the frozen fit after which the curve stays
+    below it for `window` rows (as mechanics.offset_yield).
+    """
+
+    def __init__(self, n_columns, window=fit_window):
+        self.window = window
+        self.table = GrowingTable(n_columns)
+        self.smoother = StreamingSavgol(window_length, polyorder)
+        self.curve = GrowingTable(2)    # strain, smoothed stress
+        self.windows = GrowingTable(2)  # slope, R^2 of the window starting at each row
+        self.sums = np.zeros(5)  # n, sum x, sum y, sum x^2, sum xy
+        self.modulus = self.intercept = None
+        self.initial = None     # median slope of the first windows
+        self.checked = window   # windows tested against it so far
+        self.elastic_end = None  # last row of the elastic regime, once known
+        self.scan = 1           # first row the yield search has not ruled out
+        self.yield_strain = self.yield_stress = None
+        self.uts = -np.inf
+        self.uts_strain = None
+        self.uts_row = None
+        self.uts_confirmed = False
+
+    @property
+    def yielded(self):
+        return self.yield_strain is not None
+
+    def fit(self):
+        n, sx, sy, sxx, sxy = self.sums
+        denominator = n * sxx - sx * sx
+        if n >= 2 and denominator > 0:
+            self.modulus = (n * sxy - sx * sy) / denominator
+            self.intercept = (sy - self.modulus * sx) / n
+
+    def offset_line(self, strain):
+        return self.modulus * (strain - offset) + self.intercept
+
+    def update(self, rows):
+        """
+        rows: new rows of the fix print file
+
+        Returns: list of event strings (e.g. the yield point once confirmed)
+        """
+        self.table.append(rows)
+        smoothed = self.smoother.push(rows[:, stress_column])
+        start = self.curve.size
+        strain = self.table.view()[start:start + len(smoothed), strain_column]
+        self.curve.append(np.column_stack([strain, smoothed]))
+        if len(smoothed) == 0:
+            return []
+
+        peak = int(np.argmax(smoothed))
+        if smoothed[peak] > self.uts:
+            self.uts, self.uts_strain = float(smoothed[peak]), float(strain[peak])
+            self.uts_row = start + peak
+
+        events = []
+        if self.elastic_end is None:
+            self.sums += (len(strain), strain.sum(), smoothed.sum(), strain @ strain, strain @ smoothed)
+            self.fit()
+            self.find_elastic_end()
+            if self.elastic_end is not None:
+                events.append(f"ELASTIC REGIME ENDS at strain {self.curve.view()[self.elastic_end, 0]:.5f} "
+                              f"(E = {self.modulus:.2f})")
+        if self.elastic_end is not None and not self.yielded:
+            self.find_yield()
+            if self.yielded:
+                events.append(f"YIELD PASSED at strain {self.yield_strain:.5f}, "
+                              f"stress {self.yield_stress:.4f} (E = {self.modulus:.2f})")
+
+        after_peak = smoothed[max(self.uts_row + 1 - start, 0):]
+        if self.yielded and not self.uts_confirmed and np.any(after_peak < (1 - uts_drop) * self.uts):
+            self.uts_confirmed = True
+            events.append(f"UTS PASSED: {self.uts:.4f} at strain {self.uts_strain:.5f}")
+        return events
+
+    # Fits of the windows completed by the new rows; the first one that is no
+    # longer elastic freezes the modulus over the rows before its leading edge
+    def find_elastic_end(self):
+        data = self.curve.view()
+        first = self.windows.size
+        if len(data) - first >= self.window:
+            slope, _, r2 = window_fits(data[first:, 0], data[first:, 1], self.window)
+            self.windows.append(np.column_stack([slope, r2]))
+        if self.windows.size < self.window:
+            return
+        slope, r2 = self.windows.view().T
+        if self.initial is None:
+            self.initial = np.median(slope[:self.window])
+        elastic = ((np.abs(slope[self.checked:] - self.initial) <= slope_tol * abs(self.initial))
+                   & (r2[self.checked:] >= r2_min))
+        failing = np.flatnonzero(~elastic)
+        if failing.size == 0:
+            self.checked = self.windows.size
+            return
+        self.elastic_end = int(failing[0] + self.checked) + self.window - 2
+        sums, x0, y0 = running_sums(data[:, 0], data[:, 1])
+        self.modulus, self.intercept, _ = (float(v) for v in line_fits(sums, x0, y0, 0, self.elastic_end + 1))
+
+    # Offset-line crossing that the curve stays below for a window, interpolated
+    # between the rows on either side; rows that cannot start one are not revisited
+    def find_yield(self):
+        data = self.curve.view()[self.scan - 1:]
+        gap = data[:, 1] - self.offset_line(data[:, 0])
+        below = gap[1:] < 0
+        if len(below) < self.window:
+            return
+        k = first_persistent(below, self.window)
+        if k is None:
+            above = np.flatnonzero(~below)
+            self.scan += int(above[-1]) + 1 if above.size else 0
+            return
+        t = gap[k] / (gap[k] - gap[k + 1])
+        (x0, y0), (x1, y1) = data[k], data[k + 1]
+        self.yield_strain = float(x0 + t * (x1 - x0))
+        self.yield_stress = float(y0 + t * (y1 - y0))
+
+    def status(self):
+        data = self.table.view()
+        return {
+            "rows": int(self.table.size),
+            "strain": float(data[-1, strain_column]) if self.table.size else None,
+            "modulus": self.modulus,
+            "elastic_end_strain": float(self.curve.view()[self.elastic_end, 0]) if self.elastic_end is not None else None,
+            "yielded": self.yielded,
+            "yield_strain": self.yield_strain,
+            "yield_stress": self.yield_stress,
+            "uts": self.uts if self.uts_row is not None else None,
+            "uts_strain": self.uts_strain,
+            "uts_confirmed": self.uts_confirmed,
+        }
+
+def format_status(status):
+    line = f"{status['rows']:7d} rows  strain {status['strain']:.5f}"
+    if status["modulus"] is not None:
+        line += f"  E {status['modulus']:9.3f}"
+    if status["uts"] is not None:
+        line += f"  UTS {status['uts']:.4f} @ {status['uts_strain']:.5f}"
+    if status["yielded"]:
+        line += f"  yield {status['yield_stress']:.4f} @ {status['yield_strain']:.5f}"
+    return line
+
+# Main execution
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description="Follow a running tensile test's fix print file")
+    cli.add_argument("file", help="fix print output, e.g. Al_SC_100.def1.txt")
+    cli.add_argument("--poll", type=float, default=poll_interval, help="seconds between polls")
+    cli.add_argument("--idle-timeout", type=float, default=None,
+                     help="stop when the file has not grown for this many seconds")
+    cli.add_argument("--stop-after-uts", action="store_true",
+                     help="exit once yield and UTS are both known (the run can then be stopped)")
+    cli.add_argument("--window", type=int, default=fit_window, help="rows per sliding-window fit")
+    cli.add_argument("--status-file", help="JSON file rewritten with the current estimates every poll")
+    args = cli.parse_args()
+
+    monitor = None
+    for header, rows in follow_rows(args.file, args.poll, args.idle_timeout):
+        monitor = monitor or StressStrainMonitor(len(header.names), args.window)
+        events = monitor.update(rows)
+        status = monitor.status()
+        print(format_status(status), flush=True)
+        for event in events:
+            print(event, flush=True)
+        if args.status_file:
+            with open(args.status_file, "w") as f:
+                json.dump(status, f, indent=1)
+        if args.stop_after_uts and monitor.uts_confirmed:
+            break
@@ -0,0 +1,147 @@
+import numpy as np
+
+# Mechanical properties of a stress-strain curve: elastic modulus, 0.2% offset
+# yield point, UTS and strain at failure, with the elastic regime found
+# automatically. Every least-squares line (over every sliding window of the
+# curve, or over its elastic part) comes from one set of cumulative sums, so a
+# whole curve costs O(n) vectorized work and thousands of curves can be
+# processed in a study.
+
+# Constants
+offset = 0.002        # Strain offset of the yield criterion (0.2%)
+slope_tol = 0.1       # A window is elastic while its slope is within 10% of the initial modulus
+r2_min = 0.98         # ... and its R^2 at least this
+failure_fraction = 0.1  # Failure: stress after the UTS drops below this fraction of it
+
+# ----------------------- Least Squares From Cumulative Sums -------------------
+def running_sums(x, y):
+    """
+    Cumulative sums of 1, x, y, x^2, xy, y^2 (with x and y centred first,
+    which keeps the differences of large sums accurate), padded with a
+    leading zero so that sums[b] - sums[a] covers points a..b-1.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    x0, y0 = x.mean(), y.mean()
+    dx, dy = x - x0, y - y0
+    terms = np.stack([np.ones_like(dx), dx, dy, dx * dx, dx * dy, dy * dy])
+    sums = np.zeros((6, len(x) + 1))
+    np.cumsum(terms, axis=1, out=sums[:, 1:])
+    return sums, x0, y0
+
+def line_fits(sums, x0, y0, a, b):
+    """
+    Least-squares lines through points a..b-1 for arrays of bounds a, b.
+
+    Returns: (slope, intercept, r2) arrays
+    """
+    n, sx, sy, sxx, sxy, syy = sums[:, b] - sums[:, a]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vxx = n * sxx - sx * sx
+        vxy = n * sxy - sx * sy
+        vyy = n * syy - sy * sy
+        slope = vxy / vxx
+        r2 = vxy * vxy / (vxx * vyy)
+        intercept = (sy - slope * sx) / n + y0 - slope * x0
+    return slope, intercept, r2
+
+# Line over every window of `window` consecutive points (window i starts at point i)
+def window_fits(x, y, window):
+    sums, x0, y0 = running_sums(x, y)
+    start = np.arange(len(x) - window + 1)
+    return line_fits(sums, x0, y0, start, start + window)
+
+# First k with mask[k:k + length] all True (None if there is none), so noise
+# that crosses a threshold for a few samples is not mistaken for a real event
+def first_persistent(mask, length):
+    length = min(length, len(mask))
+    counts = np.concatenate([[0], np.cumsum(mask)])
+    runs = np.flatnonzero(counts[length:] - counts[:-length] == length)
+    return int(runs[0]) if runs.size else None
+
+# ----------------------- Properties -------------------------------------------
+def default_window(n):
+    return max(10, n // 100)
+
+def elastic_end(strain, stress, window=None, slope_tol=slope_tol, r2_min=r2_min):
+    """
+    Last index of the linear regime: the sliding window moves along the
+    curve until its slope leaves slope_tol of the initial modulus (the median
+    slope of the first `window` windows) or its R^2 falls below r2_min. The
+    end is the point just before the leading edge of that first window.
+
+    Returns: index into strain / stress
+    """
+    n = len(strain)
+    window = window or default_window(n)
+    if n < 2 * window:
+        return n - 1
+    slope, _, r2 = window_fits(strain, stress, window)
+    initial = np.median(slope[:window])
+    elastic = (np.abs(slope - initial) <= slope_tol * abs(initial)) & (r2 >= r2_min)
+    failing = np.flatnonzero(~elastic[window:])  # the first windows define the initial modulus
+    if failing.size == 0:
+        return n - 1
+    return int(failing[0] + window) + window - 2
+
+def offset_yield(strain, stress, modulus, intercept, offset=offset, persist=10):
+    """
+    Crossing of the curve below the offset line modulus * (strain - offset)
+    + intercept after which it stays below for `persist` samples,
+    interpolated between the samples on either side.
+
+    Returns: (yield strain, yield stress, index of the first sample below) or
+             (None, None, None) if the curve never crosses it
+    """
+    strain = np.asarray(strain, dtype=np.float64)
+    stress = np.asarray(stress, dtype=np.float64)
+    gap = stress - (modulus * (strain - offset) + intercept)
+    k = first_persistent(gap < 0, persist)
+    if not k:  # never below, or below from the first sample on
+        return None, None, None
+    t = gap[k - 1] / (gap[k - 1] - gap[k])
+    return (float(strain[k - 1] + t * (strain[k] - strain[k - 1])),
+            float(stress[k - 1] + t * (stress[k] - stress[k - 1])), k)
+
+def mechanical_properties(strain, stress, window=None, offset=offset, slope_tol=slope_tol, r2_min=r2_min,
+                          failure_fraction=failure_fraction):
+    """
+    strain, stress: the curve (pass smoothed stress for noisy data)
+
+    Returns: dict with
+        elastic_end     last index of the linear regime
+        elastic_boundary    strain where the plastic regime starts (that of
+                        the last point if the whole curve is elastic)
+        modulus, intercept, r2    line fitted to points 0..elastic_end
+        yield_strain, yield_stress, yield_index    0.2% offset yield point
+        uts, uts_strain, uts_index
+        failure_strain  strain after the UTS from which the stress stays
+                        below failure_fraction * UTS for a window (None if
+                        it never gets there)
+    """
+    strain = np.asarray(strain, dtype=np.float64)
+    stress = np.asarray(stress, dtype=np.float64)
+    window = window or default_window(len(strain))
+    end = elastic_end(strain, stress, window, slope_tol, r2_min)
+    sums, x0, y0 = running_sums(strain, stress)
+    modulus, intercept, r2 = (float(v) for v in line_fits(sums, x0, y0, 0, end + 1))
+    yield_strain, yield_stress, yield_index = offset_yield(strain, stress, modulus, intercept, offset, window)
+
+    uts_index = int(np.argmax(stress))
+    failed = first_persistent(stress[uts_index:] < failure_fraction * stress[uts_index], window)
+    failure_strain = float(strain[uts_index + failed]) if failed is not None else None
+
+    return {
+        "elastic_end": end,
+        "elastic_boundary": float(strain[min(end + 1, len(strain) - 1)]),
+        "modulus": modulus,
+        "intercept": intercept,
+        "r2": r2,
+        "yield_strain": yield_strain,
+        "yield_stress": yield_stress,
+        "yield_index": yield_index,
+        "uts": float(stress[uts_index]),
+        "uts_strain": float(strain[uts_index]),
+        "uts_index": uts_index,
+        "failure_strain": failure_strain,
+    }
@@ -0,0 +1,229 @@
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import oaconvolve
+
+# Savitzky-Golay smoothing: every output is the value at its sample of the
+# least-squares polynomial through the `window` samples around it. For evenly
+# spaced samples that is a fixed set of weights, computed once per
+# (window, order) and applied as a convolution; the half windows at either
+# end use the polynomial of the first / last full window (scipy's
+# savgol_filter(mode="interp"), which these functions reproduce).
+#
+#   savgol(y, window, order)            one curve or a (curves, samples) batch
+#   savgol_bank(y, windows, order)      several windows in one pass over the data
+#   savgol_nonuniform(x, y, window, order)   uneven sample spacing
+#   StreamingSavgol                     samples arriving a few at a time
+#
+# The convolutions are overlap-add FFT convolutions (blocked, O(n log window)),
+# so 10^6-sample curves and batches of them cost a single call.
+
+# Constants
+block_values = 1 << 20  # Window samples per block of local fits (savgol_nonuniform)
+
+# ----------------------- Coefficients -----------------------------------------
+def check_window(window, order):
+    if window % 2 == 0 or window < 1:
+        raise ValueError(f"window must be a positive odd number, got {window}")
+    if order >= window:
+        raise ValueError(f"polynomial order {order} must be less than the window {window}")
+
+@lru_cache(maxsize=None)
+def fit_matrix(window, order):
+    """
+    Least-squares operator of a polynomial fit over `window` samples at
+    positions -h..h (h = window // 2): the smoothed value at position t is
+    [t^0, t^1, ...] @ fit_matrix @ samples.
+
+    Returns: (order + 1, window) array
+    """
+    check_window(window, order)
+    half = window // 2
+    positions = np.arange(-half, half + 1, dtype=np.float64)
+    vandermonde = positions[:, None] ** np.arange(order + 1)
+    matrix = np.linalg.pinv(vandermonde)
+    matrix.setflags(write=False)
+    return matrix
+
+@lru_cache(maxsize=None)
+def coefficients(window, order):
+    """
+    Returns: (window,) weights of the centre value, applied as
+             sum(weights * samples[i - h:i + h + 1])
+    """
+    weights = fit_matrix(window, order)[0].copy()
+    weights.setflags(write=False)
+    return weights
+
+@lru_cache(maxsize=None)
+def edge_matrix(window, order):
+    """
+    Returns: (h, window) weights of the first h outputs, taken from the
+             polynomial through the first window samples (the last h use it
+             reversed)
+    """
+    half = window // 2
+    positions = np.arange(-half, 0, dtype=np.float64)
+    matrix = (positions[:, None] ** np.arange(order + 1)) @ fit_matrix(window, order)
+    matrix.setflags(write=False)
+    return matrix
+
+# ----------------------- Evenly Spaced Samples --------------------------------
+def apply_edges(y, out, window, order):
+    half = window // 2
+    if half:
+        edges = edge_matrix(window, order)
+        out[..., :half] = y[..., :window] @ edges.T
+        out[..., -half:] = (y[..., ::-1][..., :window] @ edges.T)[..., ::-1]
+    return out
+
+def windowed_products(y, kernels):
+    """
+    kernels: (k, window) weight vectors
+    y: (..., n) with n >= window
+
+    Returns: (k, ..., n - window + 1) sums of every kernel against every full
+             window, from one batched convolution
+    """
+    kernels = kernels.reshape((len(kernels),) + (1,) * (y.ndim - 1) + (kernels.shape[1],))
+    return oaconvolve(y[None], kernels[..., ::-1], mode="valid", axes=-1)
+
+def savgol(y, window, order):
+    """
+    y: (n,) curve or (curves, n) batch, smoothed along the last axis
+
+    Returns: smoothed array of the same shape
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if y.shape[-1] < window:
+        raise ValueError(f"window {window} is longer than the {y.shape[-1]} samples")
+    half = window // 2
+    out = np.empty_like(y)
+    out[..., half:y.shape[-1] - half] = windowed_products(y, coefficients(window, order)[None])[0]
+    return apply_edges(y, out, window, order)
+
+def savgol_bank(y, windows, order):
+    """
+    Multi-resolution smoothing: every window of `windows` applied to every
+    curve of y as one batched convolution (the kernels are zero-padded to the
+    largest window and stacked).
+
+    Returns: (len(windows),) + y.shape array
+    """
+    y = np.asarray(y, dtype=np.float64)
+    widest = max(windows)
+    if y.shape[-1] < widest:
+        raise ValueError(f"window {widest} is longer than the {y.shape[-1]} samples")
+    wide_half = widest // 2
+    kernels = np.zeros((len(windows), widest))
+    for k, window in enumerate(windows):
+        start = wide_half - window // 2
+        kernels[k, start:start + window] = coefficients(window, order)
+
+    out = np.empty((len(windows),) + y.shape)
+    n = y.shape[-1]
+    out[..., wide_half:n - wide_half] = windowed_products(y, kernels)
+    for k, window in enumerate(windows):
+        # samples between a narrow window's edge and the widest one's
+        half = window // 2
+        if wide_half > half:
+            inner = windowed_products(y[..., :widest - 1], kernels[k:k + 1, wide_half - half:wide_half + half + 1])[0]
+            out[k, ..., half:wide_half] = inner[..., :wide_half - half]
+            inner = windowed_products(y[..., n - widest + 1:], kernels[k:k + 1, wide_half - half:wide_half + half + 1])[0]
+            out[k, ..., n - wide_half:n - half] = inner[..., -(wide_half - half):]
+        apply_edges(y, out[k], window, order)
+    return out
+
+# ----------------------- Unevenly Spaced Samples ------------------------------
+# t[..., None] ** [0, 1, ..., order], by repeated products (much faster than **)
+def vandermonde_of(t, order):
+    powers = np.empty(t.shape + (order + 1,))
+    powers[..., 0] = 1.0
+    for k in range(1, order + 1):
+        powers[..., k] = powers[..., k - 1] * t
+    return powers
+
+def savgol_nonuniform(x, y, window, order, block=block_values):
+    """
+    Local polynomial fits in the actual sample positions x (e.g. strain when
+    the output interval or the strain rate changed during a run). Each
+    window's fit is solved from its own normal equations, all windows of a
+    block in one batched solve. With evenly spaced x this equals savgol.
+
+    y: (n,) or (curves, n) sampled at x (n,)
+
+    Returns: smoothed array of y's shape
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    check_window(window, order)
+    n = len(x)
+    if n < window:
+        raise ValueError(f"window {window} is longer than the {n} samples")
+    half = window // 2
+    out = np.empty_like(y)
+
+    def local_vandermonde(centre_index):
+        # powers of each window's positions relative to (and scaled around) its centre
+        windows = sliding_window_view(x, window)[centre_index - half]
+        centre = x[centre_index][:, None]
+        scale = np.maximum(np.abs(windows - centre).max(axis=1, keepdims=True), np.finfo(float).tiny)
+        return vandermonde_of((windows - centre) / scale, order), centre, scale
+
+    # centre values: c = (V^T V)^-1 V^T y per window, of which only c[0] is needed,
+    # i.e. the first row of the (symmetric) inverse applied to V^T y
+    step = max(1, block // window)  # windows per block
+    for start in range(half, n - half, step):
+        centres = np.arange(start, min(start + step, n - half))
+        vandermonde, _, _ = local_vandermonde(centres)
+        normal = np.swapaxes(vandermonde, 1, 2) @ vandermonde
+        first_row = np.linalg.solve(normal, np.broadcast_to(np.eye(order + 1)[:, :1], normal.shape[:-1] + (1,)))
+        weights = (vandermonde @ first_row)[..., 0]  # (m, window) weights of each centre value
+        samples = sliding_window_view(y, window, axis=-1)[..., centres[0] - half:centres[-1] - half + 1, :]
+        out[..., centres] = np.einsum("...mw,mw->...m", samples, weights)
+
+    if half:
+        # the first / last h samples take the polynomial of the first / last full window
+        vandermonde, centre, scale = local_vandermonde(np.array([half, n - 1 - half]))
+        targets = (np.stack([x[:half], x[n - half:]]) - centre) / scale
+        edge_weights = vandermonde_of(targets, order) @ np.linalg.pinv(vandermonde)  # (2, h, window)
+        out[..., :half] = y[..., :window] @ edge_weights[0].T
+        out[..., n - half:] = y[..., n - window:] @ edge_weights[1].T
+    return out
+
+# ----------------------- Streaming --------------------------------------------
+class StreamingSavgol:
+    """
+    Smoothing of a curve whose samples arrive in pieces (a run that is still
+    writing its output). push() returns the outputs that became final: an
+    output needs the h samples after it, so the results trail the input by
+    h. finish() returns the last h. Concatenated, they equal savgol() of
+    the whole curve; the work per push is proportional to the new samples.
+    """
+
+    def __init__(self, window, order):
+        check_window(window, order)
+        self.window = window
+        self.order = order
+        self.half = window // 2
+        self.tail = np.empty(0)  # last window - 1 samples: the start of the next window
+        self.last_window = None  # last full window, for the outputs at the end
+
+    def push(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        data = np.concatenate([self.tail, values])
+        if len(data) < self.window:
+            self.tail = data
+            return np.empty(0)
+        out = [windowed_products(data, coefficients(self.window, self.order)[None])[0]]
+        if self.last_window is None:  # first full window: the leading edge is final too
+            out.insert(0, data[:self.window] @ edge_matrix(self.window, self.order).T)
+        self.tail = data[len(data) - self.window + 1:]
+        self.last_window = data[len(data) - self.window:]
+        return np.concatenate(out)
+
+    def finish(self):
+        if self.last_window is None:
+            raise ValueError(f"fewer samples than the window {self.window}")
+        return (self.last_window[::-1] @ edge_matrix(self.window, self.order).T)[::-1]
@@ -0,0 +1,240 @@
+import argparse
+import csv
+from itertools import product
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from lammps_dump import DumpReader
+from trajectory_pool import map_frames
+
+# Local structure of the atoms of a dump frame, recomputed offline:
+#   centro-symmetry parameter  as LAMMPS' compute centro/atom N
+#   adaptive common neighbor analysis (a-CNA, Stukowski 2012): FCC / HCP /
+#   BCC / other, the classification OVITO shows
+# Neighbors come from one KD-tree query for the whole frame (periodic
+# boundaries through image atoms, so triclinic boxes work too). The CNA
+# signatures of all atoms are then computed block by block as small batched
+# matrix products over each atom's neighbor shell, e.g.
+#     python structure.py "Q2_UNIAX_LOAD_Al/Q2_300K/dump.tensile_*.cfg"
+# prints the structure fractions of every frame, analyzed in parallel.
+
+# Constants
+OTHER, FCC, HCP, BCC = 0, 1, 2, 3
+STRUCTURE_NAMES = ["other", "fcc", "hcp", "bcc"]
+csp_neighbors = 12       # 12 for fcc / hcp, 8 for bcc
+block_atoms = 1 << 13    # Atoms per block of the CNA bond matrices
+a_cna_factor = (1 + np.sqrt(2)) / 2  # Local cutoff between 1st and 2nd fcc neighbor shell
+
+# ----------------------- Neighbor Search --------------------------------------
+def periodic_flags(boundary):
+    return np.array([flag.startswith("p") for flag in boundary.split()])
+
+def with_images(positions, origin, cell, periodic, margin):
+    """
+    Atoms wrapped into the box plus periodic images of those within `margin`
+    of a periodic face.
+
+    Returns: (wrapped positions (n, 3), all points (m, 3), atom of each point (m,))
+    """
+    fractional = (positions - origin) @ np.linalg.inv(cell)
+    fractional[:, periodic] %= 1.0
+    wrapped = origin + fractional @ cell
+
+    volume = abs(np.linalg.det(cell))
+    spacing = np.array([volume / np.linalg.norm(np.cross(cell[(d + 1) % 3], cell[(d + 2) % 3])) for d in range(3)])
+    reach = margin / spacing  # margin in fractional units per direction
+    ranges = [range(-int(np.ceil(r)), int(np.ceil(r)) + 1) if p else (0,) for r, p in zip(reach, periodic)]
+
+    points, owners = [wrapped], [np.arange(len(wrapped))]
+    near_face = np.flatnonzero(np.any(periodic & ((fractional < reach) | (fractional > 1 - reach)), axis=1))
+    for shift in product(*ranges):
+        if not any(shift):
+            continue
+        shifted = fractional[near_face] + shift
+        selected = near_face[np.all((shifted > -reach) & (shifted < 1 + reach), axis=1)]
+        points.append(wrapped[selected] + np.asarray(shift, dtype=np.float64) @ cell)
+        owners.append(selected)
+    return wrapped, np.concatenate(points), np.concatenate(owners)
+
+def nearest_neighbors(positions, origin, cell, periodic, k, workers=-1):
+    """
+    The k nearest neighbors of every atom, nearest first. workers: query
+    threads (-1: one per core; pass 1 inside a process pool).
+
+    Returns: (vectors (n, k, 3) from each atom to its neighbors,
+              neighbor atom indices (n, k))
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    n = len(positions)
+    if n <= k and not periodic.any():
+        raise ValueError(f"{n} atoms cannot have {k} neighbors each")
+    # a sphere holding k + 1 atoms at the box's mean density, with room to spare
+    density = n / abs(np.linalg.det(cell))
+    margin = 1.5 * (3 * (k + 1) / (4 * np.pi * density)) ** (1 / 3)
+    while True:
+        wrapped, points, owners = with_images(positions, origin, cell, periodic, margin)
+        tree = cKDTree(points, balanced_tree=False, compact_nodes=False)
+        # images are only complete within margin: a neighbor beyond it may be missing
+        bound = margin if periodic.any() else np.inf
+        distances, index = tree.query(wrapped, k + 1, distance_upper_bound=bound, workers=workers)
+        if np.isfinite(distances[:, -1]).all():
+            break
+        margin *= 2
+    index = index[:, 1:]  # the nearest point is the atom itself
+    return points[index] - wrapped[:, None], owners[index]
+
+# ----------------------- Centro-Symmetry --------------------------------------
+def centro_symmetry(vectors, n_neighbors=csp_neighbors):
+    """
+    vectors: (n, >= n_neighbors, 3) neighbor vectors, nearest first
+
+    Returns: (n,) sum of the n_neighbors / 2 smallest |R_j + R_k|^2 over all
+             pairs of the n_neighbors nearest neighbors (centro/atom)
+    """
+    vectors = vectors[:, :n_neighbors]
+    j, k = np.triu_indices(n_neighbors, 1)
+    half = n_neighbors // 2
+    csp = np.empty(len(vectors))
+    for start in range(0, len(vectors), block_atoms):
+        block = vectors[start:start + block_atoms]
+        gram = block @ np.swapaxes(block, 1, 2)  # |R_j + R_k|^2 = R_j.R_j + R_k.R_k + 2 R_j.R_k
+        squared = np.einsum("nii->ni", gram)
+        pair_sums = squared[:, j] + squared[:, k] + 2 * gram[:, j, k]
+        csp[start:start + block_atoms] = np.partition(pair_sums, half - 1, axis=1)[:, :half].sum(axis=1)
+    return csp
+
+# ----------------------- Common Neighbor Analysis -----------------------------
+def bond_matrices(vectors, cutoff):
+    """
+    vectors: (n, M, 3) neighbor shells; cutoff: (n,) local cutoffs
+
+    Returns: (n, M, M) bool, neighbors j and k of an atom closer than its cutoff
+    """
+    gram = vectors @ np.swapaxes(vectors, 1, 2)
+    squared = np.einsum("nii->ni", gram)
+    distance2 = squared[:, :, None] + squared[:, None, :] - 2 * gram
+    bonds = distance2 < (cutoff ** 2)[:, None, None]
+    bonds[:, np.arange(vectors.shape[1]), np.arange(vectors.shape[1])] = False
+    return bonds
+
+def signatures(bonds):
+    """
+    CNA signature parts of every (atom, neighbor j) pair from the shell bonds:
+    common neighbors of the atom and j (shell atoms bonded to j), bonds among
+    them, and the largest degree in that common-neighbor bond graph.
+
+    Returns: (n_common, n_bonds, max_degree), each (n, M) int
+    """
+    b = bonds.astype(np.float32)
+    degree = (b * (b @ b)).astype(np.int64)  # degree[j, k]: bonds of k among j's common neighbors
+    return bonds.sum(axis=2), degree.sum(axis=2) // 2, degree.max(axis=2)
+
+def longest_chain(bonds, j):
+    """
+    Bonds in the largest connected cluster of bonds among the common
+    neighbors of each atom and its neighbor j[i].
+
+    Returns: (n,) int
+    """
+    n, M, _ = bonds.shape
+    rows = np.arange(n)
+    common = bonds[rows, j]  # (n, M)
+    graph = bonds & common[:, :, None] & common[:, None, :]
+    labels = np.where(common, np.arange(M), M)
+    for _ in range(M):  # propagate the smallest label through each cluster
+        labels = np.minimum(labels, np.where(graph, labels[:, None, :], M).min(axis=2))
+    edge_labels = np.where(np.triu(graph), labels[:, :, None], M)
+    counts = (edge_labels[..., None] == np.arange(M)).sum(axis=(1, 2))
+    return counts.max(axis=1)
+
+def adaptive_cna(vectors):
+    """
+    vectors: (n, >= 14, 3) neighbor vectors, nearest first
+
+    Returns: (n,) structure type (OTHER, FCC, HCP, BCC)
+    """
+    n = len(vectors)
+    structure = np.full(n, OTHER, dtype=np.int8)
+    for start in range(0, n, block_atoms):
+        shell = vectors[start:start + block_atoms]
+        length = np.linalg.norm(shell, axis=2)
+        found = structure[start:start + block_atoms]
+
+        # FCC / HCP: 12 nearest, all with 4 common neighbors and 2 bonds between
+        # them; the bonds are disjoint (421) or share an atom (422)
+        cutoff = a_cna_factor * length[:, :12].mean(axis=1)
+        n_common, n_bonds, max_degree = signatures(bond_matrices(shell[:, :12], cutoff))
+        close_packed = np.all((n_common == 4) & (n_bonds == 2), axis=1)
+        n_422 = (max_degree == 2).sum(axis=1)
+        found[close_packed & (n_422 == 0)] = FCC
+        found[close_packed & (n_422 == 6)] = HCP
+
+        # BCC: 14 nearest, 8 first neighbors with 666 and 6 second with 444
+        rest = np.flatnonzero(found == OTHER)
+        if rest.size == 0:
+            continue
+        bcc_shell = shell[rest, :14]
+        bcc_length = length[rest, :14]
+        cutoff = a_cna_factor * (2 / np.sqrt(3) * bcc_length[:, :8].mean(axis=1) + bcc_length[:, 8:].mean(axis=1)) / 2
+        bonds = bond_matrices(bcc_shell, cutoff)
+        n_common, n_bonds, _ = signatures(bonds)
+        sixes = (n_common == 6) & (n_bonds == 6)
+        fours = (n_common == 4) & (n_bonds == 4)  # 4 bonds on 4 atoms are always one cluster
+        candidate = np.flatnonzero((sixes.sum(axis=1) == 8) & (fours.sum(axis=1) == 6))
+        if candidate.size:
+            atom, neighbor = np.nonzero(sixes[candidate])
+            chained = (longest_chain(bonds[candidate[atom]], neighbor) == 6).reshape(-1, 8).all(axis=1)
+            found[rest[candidate[chained]]] = BCC
+    return structure
+
+# ----------------------- Frames -----------------------------------------------
+def analyze_frame(frame, n_csp=csp_neighbors, workers=-1):
+    """
+    frame: lammps_dump.Frame with coordinate columns
+    workers: neighbor query threads, as for nearest_neighbors
+
+    Returns: (centro-symmetry (n,), structure type (n,))
+    """
+    vectors, _ = nearest_neighbors(frame.positions(), frame.origin, frame.cell, periodic_flags(frame.boundary),
+                                   max(14, n_csp), workers)
+    return centro_symmetry(vectors, n_csp), adaptive_cna(vectors)
+
+# Per-frame summary for map_frames: structure counts and mean centro-symmetry
+# (one query thread per worker, as the pool already runs a process per core)
+def structure_summary(frame, n_csp=csp_neighbors, workers=1):
+    csp, structure = analyze_frame(frame, n_csp, workers)
+    return frame.timestep, np.bincount(structure, minlength=len(STRUCTURE_NAMES)), float(csp.mean())
+
+def coordinate_columns(names):
+    for fields in (("x", "y", "z"), ("xu", "yu", "zu"), ("xs", "ys", "zs"), ("xsu", "ysu", "zsu")):
+        if all(f in names for f in fields):
+            return list(fields)
+    raise KeyError(f"no coordinate columns among {names}")
+
+# Main execution
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description="Centro-symmetry and adaptive CNA of every frame of a dump")
+    cli.add_argument("dumps", help='dump file or glob, e.g. "dump.tensile_*.cfg"')
+    cli.add_argument("--csp-neighbors", type=int, default=csp_neighbors, help="N of centro/atom N")
+    cli.add_argument("--output", help="CSV file for the per-frame structure fractions")
+    cli.add_argument("--processes", type=int, default=None)
+    args = cli.parse_args()
+
+    with DumpReader(args.dumps) as reader:
+        columns = coordinate_columns(reader.files[0]["names"])
+    workers = -1 if args.processes == 1 else 1  # a single worker process may use every core
+    summaries = map_frames(args.dumps, structure_summary, (args.csp_neighbors, workers), columns=columns,
+                           processes=args.processes)
+
+    header = ["step"] + STRUCTURE_NAMES + ["mean_csp"]
+    print("".join(f"{name:>10}" for name in header))
+    rows = []
+    for timestep, counts, mean_csp in summaries:
+        rows.append([timestep, *(counts / counts.sum()), mean_csp])
+        print(f"{timestep:>10}" + "".join(f"{value:10.4f}" for value in rows[-1][1:]))
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
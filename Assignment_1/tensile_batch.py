@@ -0,0 +1,156 @@
+import argparse
+import csv
+import re
+from multiprocessing import Pool, cpu_count
+from pathlib import Path
+
+import numpy as np
+
+from binary_cache import cached_columns
+from lammps_io import read_columns
+from mechanics import mechanical_properties
+from smoothing import savgol
+
+# Mechanical properties of every tensile run under a directory tree, e.g.
+#     python tensile_batch.py Q2_UNIAX_LOAD_Al --output properties.csv
+# finds each fix print file (Al_SC_*.def1.txt), reads it once (through the
+# binary cache), smooths the stress as the Q2 plot scripts do and extracts E,
+# the 0.2% offset yield point and the UTS. Runs are spread over a process
+# pool and come back as one table sorted by temperature and strain rate.
+# Temperature and strain rate are read from the md.in next to the file
+# (fix npt temp / variable srate), or from the path (e.g. Q2_300K) if there
+# is none.
+
+# Constants
+run_pattern = "Al_SC_*.def1.txt"  # fix print files of the tensile runs
+window_length = 15                # Savitzky-Golay smoothing, as in plot_strain_stress.py
+polyorder = 3
+strain_column = 0                 # fix print columns: strain, -pxx/10000, -pyy/10000, -pzz/10000
+stress_column = 1
+
+NPT_TEMP = re.compile(r"^\s*fix\s+\S+\s+\S+\s+n[pv]t\s+temp\s+(\S+)", re.M)
+STRAIN_RATE = re.compile(r"^\s*variable\s+srate\s+equal\s+(\S+)", re.M)
+PATH_TEMP = re.compile(r"(\d+(?:\.\d+)?)K(?![A-Za-z])")
+
+TABLE_FIELDS = ["file", "temperature", "strain_rate", "rows", "modulus", "r2", "yield_strain", "yield_stress",
+                "uts", "uts_strain", "failure_strain", "error"]
+
+# ----------------------- Discovery --------------------------------------------
+def find_runs(root, pattern=run_pattern):
+    return sorted(p for p in Path(root).rglob(pattern) if ".column_cache" not in p.parts)
+
+def as_number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def run_conditions(path):
+    """
+    Returns: (temperature in K, strain rate in 1/s); None where unknown
+    """
+    path = Path(path)
+    temperature = strain_rate = None
+    script = path.parent / "md.in"
+    if script.exists():
+        text = script.read_text()
+        temps = NPT_TEMP.findall(text)
+        if temps:
+            temperature = as_number(temps[-1])  # the thermostat of the deformation run
+        rate = STRAIN_RATE.search(text)
+        if rate:
+            strain_rate = as_number(rate.group(1))
+    if temperature is None:
+        matches = PATH_TEMP.findall(path.as_posix())  # the one nearest the file wins
+        temperature = float(matches[-1]) if matches else None
+    return temperature, strain_rate
+
+# ----------------------- Analysis ---------------------------------------------
+# Stress-strain curve of one run, smoothed like the per-temperature plot scripts
+def load_curve(path):
+    data = list(cached_columns(str(path), read_columns).values())
+    strain = np.array(data[strain_column])
+    stress = np.array(data[stress_column])
+    window = min(window_length, len(stress) - (len(stress) % 2 == 0))
+    if window > polyorder:
+        stress = savgol(stress, window, polyorder)
+    return strain, stress
+
+def analyze_run(path, keep_curve=False):
+    """
+    Returns: (table row dict, (strain, smoothed stress) or None). A file that
+             cannot be read or analyzed gives a row with only its error set.
+    """
+    temperature, strain_rate = run_conditions(path)
+    row = dict.fromkeys(TABLE_FIELDS)
+    row.update(file=str(path), temperature=temperature, strain_rate=strain_rate)
+    try:
+        strain, stress = load_curve(path)
+        properties = mechanical_properties(strain, stress)
+    except (OSError, ValueError, IndexError) as error:
+        row["error"] = f"{type(error).__name__}: {error}"
+        return row, None
+    row["rows"] = len(strain)
+    for field in TABLE_FIELDS[4:-1]:
+        row[field] = properties[field]
+    return row, (strain, stress) if keep_curve else None
+
+def analyze_task(task):
+    return analyze_run(*task)
+
+def sort_key(result):
+    row = result[0]
+    return (row["temperature"] is None, row["temperature"] or 0.0,
+            row["strain_rate"] is None, row["strain_rate"] or 0.0, row["file"])
+
+def properties_table(paths, keep_curves=False, processes=None):
+    """
+    paths: fix print files (e.g. from find_runs)
+
+    Returns: list of (row, curve) sorted by temperature, then strain rate
+    """
+    tasks = [(str(p), keep_curves) for p in paths]
+    if not tasks:
+        return []
+    processes = min(processes or cpu_count(), len(tasks))
+    if processes == 1:
+        results = [analyze_task(task) for task in tasks]
+    else:
+        with Pool(processes) as pool:
+            results = pool.map(analyze_task, tasks, chunksize=max(1, len(tasks) // (4 * processes)))
+    return sorted(results, key=sort_key)
+
+# ----------------------- Output -----------------------------------------------
+def write_table(rows, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=TABLE_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def format_value(value, spec):
+    return format(value, spec) if value is not None else "-"
+
+def print_table(rows):
+    print(f"{'T (K)':>8} {'rate (1/s)':>11} {'E':>9} {'eps_y':>8} {'sigma_y':>8} {'UTS':>8}  file")
+    for row in rows:
+        if row["error"]:
+            print(f"{format_value(row['temperature'], '8.1f')} {'':>11} {'':>9} {'':>8} {'':>8} {'':>8}  "
+                  f"{row['file']}  ({row['error']})")
+            continue
+        print(f"{format_value(row['temperature'], '8.1f')} {format_value(row['strain_rate'], '11.3g')} "
+              f"{row['modulus']:9.3f} {format_value(row['yield_strain'], '8.4f')} "
+              f"{format_value(row['yield_stress'], '8.4f')} {row['uts']:8.4f}  {row['file']}")
+
+# Main execution
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description="Mechanical properties of every tensile run under a directory")
+    cli.add_argument("root", nargs="?", default=".", help="directory searched recursively")
+    cli.add_argument("--pattern", default=run_pattern, help="fix print file names to look for")
+    cli.add_argument("--output", default="tensile_properties.csv", help="CSV file for the table")
+    cli.add_argument("--processes", type=int, default=None)
+    args = cli.parse_args()
+
+    rows = [row for row, _ in properties_table(find_runs(args.root, args.pattern), processes=args.processes)]
+    print_table(rows)
+    write_table(rows, args.output)
+    print(f"{len(rows)} runs written to {args.output}")
@@ -0,0 +1,127 @@
+import operator
+import sys
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+
+from lammps_dump import DumpReader
+
+# Frame-parallel analysis of LAMMPS dumps. The frame index of a DumpReader is
+# cut into contiguous shards that a process pool works through. Every worker
+# opens the dump once (memory-mapped, through the stored frame index) and
+# folds its shard frame by frame into one partial result, so a worker never
+# holds more than one parsed frame. The partial results of all shards are
+# then merged pairwise in a tree, in shard order, so the result does not
+# depend on which worker ran which shard.
+
+# Constants
+shards_per_worker = 4  # More shards than workers, so uneven frames still balance
+
+# ----------------------- Merging ----------------------------------------------
+# Default way to combine two partial results: + on numbers and arrays,
+# element-wise on tuples, key-wise on dicts (keys of only one side are kept)
+def merge_sum(a, b):
+    if isinstance(a, tuple):
+        return tuple(merge_sum(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict):
+        merged = dict(a)
+        for key, value in b.items():
+            merged[key] = merge_sum(merged[key], value) if key in merged else value
+        return merged
+    return a + b
+
+def tree_merge(parts, combine=merge_sum):
+    parts = list(parts)
+    if not parts:
+        return None
+    while len(parts) > 1:
+        merged = [combine(a, b) for a, b in zip(parts[0::2], parts[1::2])]
+        parts = merged + parts[len(merged) * 2:]
+    return parts[0]
+
+# ----------------------- Workers ----------------------------------------------
+worker_reader = None
+
+def open_reader(paths, use_mmap):
+    global worker_reader
+    worker_reader = DumpReader(paths, use_mmap=use_mmap)
+
+def run_shard(task):
+    """
+    task: (frames, analyze, args, combine, columns, streamed)
+
+    Returns: analyze(frame, *args) of the shard's frames, folded with combine
+    """
+    frames, analyze, args, combine, columns, streamed = task
+    read = worker_reader.stream_frame if streamed else worker_reader.read_frame
+    result = None
+    for k in frames:
+        value = analyze(read(k, columns), *args)
+        result = value if result is None else combine(result, value)
+    return result
+
+def make_shards(n_frames, n_shards):
+    return [shard for shard in np.array_split(np.arange(n_frames), n_shards) if shard.size]
+
+# ----------------------- Executor ---------------------------------------------
+def reduce_frames(paths, analyze, args=(), combine=merge_sum, frames=None, columns=None,
+                  processes=None, use_mmap=True, streamed=False):
+    """
+    Runs analyze(frame, *args) on every frame of a dump in a process pool and
+    combines the per-frame results (e.g. histograms, sums) into one.
+
+    paths: dump file, glob pattern or list of files (as for DumpReader)
+    analyze, combine: module-level functions, so they can be sent to workers
+    frames: frame numbers to analyze (default: all)
+    columns: only keep these dump columns when parsing a frame
+    streamed: analyze gets frames whose atoms come in chunks (frame.blocks,
+              see DumpReader.stream_frame), for frames too large to parse whole
+
+    Returns: the combined result (None if there are no frames)
+    """
+    # Opened once here so the frame index is built (and stored) before the workers start
+    with DumpReader(paths, use_mmap=use_mmap) as reader:
+        paths = reader.paths
+        frames = np.arange(len(reader)) if frames is None else np.asarray(frames)
+
+    processes = processes or cpu_count()
+    shards = [frames[shard] for shard in make_shards(len(frames), processes * shards_per_worker)]
+    tasks = [(shard.tolist(), analyze, args, combine, columns, streamed) for shard in shards]
+    if not tasks:
+        return None
+
+    with Pool(min(processes, len(tasks)), initializer=open_reader, initargs=(paths, use_mmap)) as pool:
+        parts = pool.map(run_shard, tasks, chunksize=1)
+    return tree_merge(parts, combine)
+
+# Per-frame result wrapped in a list, so list concatenation keeps frame order
+def listed(frame, analyze, *args):
+    return [analyze(frame, *args)]
+
+def map_frames(paths, analyze, args=(), frames=None, columns=None, processes=None, use_mmap=True,
+               streamed=False):
+    """
+    Returns: [analyze(frame, *args) for every frame], computed in parallel
+    """
+    results = reduce_frames(paths, listed, (analyze, *args), operator.add, frames, columns,
+                            processes, use_mmap, streamed)
+    return results or []
+
+# ----------------------- Example Reductions -----------------------------------
+# (counts, n_atoms) of one per-atom column, e.g. c_csym of the tensile cfg dumps
+def column_histogram(frame, column, bins):
+    counts, _ = np.histogram(frame.atoms[column], bins=bins)
+    return counts, len(frame.atoms)
+
+# Main execution
+if __name__ == "__main__":
+    # e.g. python trajectory_pool.py "dump.tensile_*.cfg" c_csym 0 20 100
+    pattern, column = sys.argv[1], sys.argv[2]
+    lo, hi, n_bins = (float(v) for v in sys.argv[3:6]) if len(sys.argv) > 5 else (0.0, 20.0, 100)
+    bins = np.linspace(lo, hi, int(n_bins) + 1)
+
+    counts, n_atoms = reduce_frames(pattern, column_histogram, (column, bins), columns=[column])
+    centers = 0.5 * (bins[1:] + bins[:-1])
+    print(f"{column} histogram over {n_atoms} atom-frames")
+    for center, fraction in zip(centers, counts / n_atoms):
+        print(f"{center:10.4f}  {fraction:.6f}")
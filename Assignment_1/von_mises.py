@@ -0,0 +1,130 @@
+import argparse
+import csv
+from pathlib import Path
+
+import numpy as np
+
+from lammps_dump import DumpReader
+from trajectory_pool import map_frames
+
+# Stress-strain series of a tensile run from its per-atom stress dumps, e.g.
+#     python von_mises.py "Q3_NANOWIRE/deform/dump.deform.*" --radius 20
+# writes Q3_NANOWIRE/deform/stress_strain.csv (v_strain, von_mises_stress, ...)
+# for plot_stress_strain.py. compute stress/atom gives every atom's stress
+# times its volume (bar * A^3), so the stress of a region is the sum over its
+# atoms divided by the region's volume: the box, or with --radius the
+# cylinder of the wire (the box of a nanowire is mostly vacuum). Frames are
+# streamed in chunks and reduced in a process pool, so only one block of
+# atoms per worker is ever parsed.
+
+# Constants
+stress_prefix = "c_2"    # compute 2 all stress/atom NULL (md.in)
+bar_to_gpa = 1e-4        # metal units: bar -> GPa, as -pxx/10000 in md.in
+n_regions = 10           # Slabs along the loading axis for the per-region stress
+AXES = "xyz"
+COMPONENTS = ["xx", "yy", "zz", "xy", "xz", "yz"]  # order of c_2[1..6]
+
+# ----------------------- Tensor Math ------------------------------------------
+def von_mises(stress):
+    """
+    stress: (..., 6) Voigt components xx yy zz xy xz yz
+
+    Returns: (...) von Mises equivalent stress
+    """
+    xx, yy, zz, xy, xz, yz = np.moveaxis(np.asarray(stress), -1, 0)
+    return np.sqrt(0.5 * ((xx - yy) ** 2 + (yy - zz) ** 2 + (zz - xx) ** 2) + 3.0 * (xy ** 2 + xz ** 2 + yz ** 2))
+
+def axis_columns(names, axis):
+    """
+    Returns: (coordinate column along the axis, True if it is a scaled one)
+    """
+    letter = AXES[axis]
+    for name, scaled in ((letter, False), (letter + "u", False), (letter + "s", True), (letter + "su", True)):
+        if name in names:
+            return name, scaled
+    raise KeyError(f"no {letter} coordinate among the dump columns {names}")
+
+# ----------------------- Per-Frame Reduction ----------------------------------
+def frame_stress(frame, stress_names, position, scaled, axis, regions):
+    """
+    Sums of the per-atom stress over the frame and over `regions` slabs along
+    the axis, accumulated block by block.
+
+    Returns: (timestep, box length along the axis, box volume,
+              summed stress (6,), per-slab summed stress (regions, 6))
+    """
+    length = frame.cell[axis, axis]
+    total = np.zeros(6)
+    per_region = np.zeros((regions, 6))
+    for block in frame.blocks:
+        stress = np.column_stack([block[name] for name in stress_names])
+        total += stress.sum(axis=0)
+        fraction = block[position] if scaled else (block[position] - frame.origin[axis]) / length
+        slab = np.clip((np.mod(fraction, 1.0) * regions).astype(np.int64), 0, regions - 1)
+        for c in range(6):
+            per_region[:, c] += np.bincount(slab, weights=stress[:, c], minlength=regions)
+    return frame.timestep, length, abs(np.linalg.det(frame.cell)), total, per_region
+
+def stress_strain(paths, axis=2, radius=None, regions=n_regions, L0=None, prefix=stress_prefix, processes=None):
+    """
+    paths: per-atom stress dumps of the deformation (file, glob or list)
+    axis: loading axis (0, 1, 2 = x, y, z)
+    radius: wire radius (A); the stress is then normalized by the cylinder
+            volume pi r^2 L instead of the box volume
+    L0: initial length along the axis (default: that of the first frame)
+
+    Returns: dict of columns: step, v_strain, von_mises_stress, s_xx ... s_yz
+             (GPa) and von_mises_region{k} for each slab
+    """
+    with DumpReader(paths) as reader:
+        names = reader.files[0]["names"]
+    stress_names = [f"{prefix}[{k}]" for k in range(1, 7)]
+    missing = [name for name in stress_names if name not in names]
+    if missing:
+        raise KeyError(f"stress/atom columns {missing} not in the dump columns {names}")
+    position, scaled = axis_columns(names, axis)
+
+    results = map_frames(paths, frame_stress, (stress_names, position, scaled, axis, regions),
+                         columns=stress_names + [position], processes=processes, streamed=True)
+    steps, lengths, box_volumes, totals, per_region = (np.array(v) for v in zip(*results))
+
+    volumes = np.pi * radius ** 2 * lengths if radius else box_volumes
+    L0 = L0 or lengths[0]
+    stress = totals / volumes[:, None] * bar_to_gpa
+    region_stress = per_region / (volumes / regions)[:, None, None] * bar_to_gpa
+
+    columns = {"step": steps, "v_strain": (lengths - L0) / L0, "von_mises_stress": von_mises(stress)}
+    for c, name in enumerate(COMPONENTS):
+        columns[f"s_{name}"] = stress[:, c]
+    region_von_mises = von_mises(region_stress)
+    for k in range(regions):
+        columns[f"von_mises_region{k}"] = region_von_mises[:, k]
+    return columns
+
+def write_columns(columns, path):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(zip(*columns.values()))
+
+# Main execution
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description="von Mises stress-strain series from per-atom stress dumps")
+    cli.add_argument("dumps", help='dump file or glob, e.g. "deform/dump.deform.*"')
+    cli.add_argument("--output", help="CSV file (default: stress_strain.csv next to the dumps)")
+    cli.add_argument("--axis", choices=AXES, default="z", help="loading axis")
+    cli.add_argument("--radius", type=float, help="wire radius (A): normalize by the wire volume, not the box")
+    cli.add_argument("--regions", type=int, default=n_regions, help="slabs along the axis")
+    cli.add_argument("--L0", type=float, help="initial length (default: from the first frame)")
+    cli.add_argument("--prefix", default=stress_prefix, help="stress/atom columns are PREFIX[1] ... PREFIX[6]")
+    cli.add_argument("--processes", type=int, default=None)
+    args = cli.parse_args()
+
+    columns = stress_strain(args.dumps, AXES.index(args.axis), args.radius, args.regions, args.L0, args.prefix,
+                            args.processes)
+    with DumpReader(args.dumps) as reader:
+        output = args.output or Path(reader.paths[0]).parent / "stress_strain.csv"
+    write_columns(columns, output)
+    print(f"{len(columns['step'])} frames written to {output}; "
+          f"peak von Mises stress {columns['von_mises_stress'].max():.4f} GPa")
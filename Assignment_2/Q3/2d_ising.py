@@ -1,5 +1,12 @@
+from functools import lru_cache
+
 import numpy as np
-import matplotlib.pyplot as plt
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from accumulator import IsingAccumulator
+from random_streams import make_generator, resolve_seed, spawn_generators
+from rendering import curve_job, render_figures, snapshot_job
 
 # Constants
 L = 32          # Lattice size (L x L)
@@ -7,24 +14,29 @@ J = 1.0         # Interaction strength
 kB = 1.0        # Boltzmann constant
 n_steps = 20000 # Monte Carlo steps per temperature (for measurement)
 eq_steps = 10000 # Number of equilibration steps
+check_every = 1000  # Steps between precision checks when stopping adaptively
 n_temp = 20     # Number of temperature points
 T_min, T_max = 1.0, 5.0  # Temperature range
+update_method = "metropolis"  # "metropolis", "metropolis-sweep", "checkerboard", "wolff" or "swendsen-wang"
+seed = None     # Base seed of the random streams (None: fresh entropy every run)
+
+# Generator used by functions that are not handed their own stream (rng=None)
+default_rng = make_generator()
 
 # Initialize lattice with random spins (+1 or -1)
-def initialize_lattice(L):
-    return np.random.choice([1, -1], size=(L, L))
+def initialize_lattice(L, rng=None):
+    rng = rng or default_rng
+    return rng.choice([1, -1], size=(L, L))
 
 # Calculate total energy of the entire lattice
 def calculate_total_energy(lattice):
-    L = len(lattice)
-    energy = 0
-    for i in range(L):
-        for j in range(L):
-            spin = lattice[i, j]
-            neighbors = (lattice[(i + 1) % L, j] + lattice[(i - 1) % L, j] +
-                         lattice[i, (j + 1) % L] + lattice[i, (j - 1) % L])
-            energy -= J * spin * neighbors
-    return energy / 2  # Avoid double-counting
+    # Each bond counted once: every site with its neighbour below and to the right
+    bonds = lattice * (np.roll(lattice, -1, axis=0) + np.roll(lattice, -1, axis=1))
+    return float(-J * np.sum(bonds))
+
+# Calculate total spin (sum of all spins) of the entire lattice
+def calculate_magnetization(lattice):
+    return int(np.sum(lattice))
 
 # Compute the change in energy for flipping a single spin
 def delta_energy(lattice, i, j):
@@ -36,21 +48,23 @@ def delta_energy(lattice, i, j):
     return 2.0 * J * spin * neighbors
 
 # Metropolis step that updates E and M locally
-def metropolis_step(lattice, E, M, T):
+def metropolis_step(lattice, E, M, T, rng=None):
     """
     lattice: 2D array of spins
     E: current total energy of the lattice
     M: current total spin (sum of all spins)
     T: temperature
+    rng: numpy Generator to draw from (default_rng if None)
 
     Returns: updated (E, M)
     """
+    rng = rng or default_rng
     L = len(lattice)
-    i, j = np.random.randint(0, L, 2)  # pick a random site
+    i, j = rng.integers(0, L, 2)      # pick a random site
     dE = delta_energy(lattice, i, j)   # energy change if we flip this spin
 
     # Metropolis acceptance criterion
-    if dE < 0 or np.random.rand() < np.exp(-dE / (kB * T)):
+    if dE < 0 or rng.random() < np.exp(-dE / (kB * T)):
         # Flip the spin
         spin_before = lattice[i, j]
         lattice[i, j] = -spin_before
@@ -64,102 +78,347 @@ def metropolis_step(lattice, E, M, T):
 
     return E, M
 
-def simulate_ising(T_range):
+# L^2 Metropolis attempts with all random numbers drawn up front
+def metropolis_sweep(lattice, E, M, T, rng=None):
+    """
+    Same moves as L^2 calls of metropolis_step, but the sites and uniforms of
+    the whole sweep come from one block draw each and acceptance is looked up
+    in acceptance_table instead of evaluating np.exp per attempt.
+
+    lattice: 2D array of spins
+    E: current total energy of the lattice
+    M: current total spin (sum of all spins)
+    T: temperature
+    rng: numpy Generator to draw from (default_rng if None)
+
+    Returns: updated (E, M)
+    """
+    rng = rng or default_rng
+    L = len(lattice)
+    table = acceptance_table(T).tolist()
+    rows = rng.integers(0, L, L * L).tolist()
+    cols = rng.integers(0, L, L * L).tolist()
+    uniforms = rng.random(L * L).tolist()
+
+    for i, j, u in zip(rows, cols, uniforms):
+        dE = delta_energy(lattice, i, j)
+        # dE = 2 * J * (s * sum of neighbours), so (dE / 2J + 4) // 2 indexes the table
+        if u < table[int(dE / (2.0 * J) + 4) // 2]:
+            spin_before = lattice[i, j]
+            lattice[i, j] = -spin_before
+            E += dE
+            M += -2 * spin_before
+
+    return E, M
+
+# Sum of the four nearest neighbours of every site, with periodic boundaries
+def neighbor_sum(lattice):
+    return (np.roll(lattice, 1, axis=0) + np.roll(lattice, -1, axis=0) +
+            np.roll(lattice, 1, axis=1) + np.roll(lattice, -1, axis=1))
+
+# Flat indices of the two checkerboard sublattices ("even" and "odd" sites)
+@lru_cache(maxsize=None)
+def sublattice_sites(L):
+    if L % 2:
+        raise ValueError(f"checkerboard updates need an even lattice size, got L = {L}")
+    parity = np.add.outer(np.arange(L), np.arange(L)).ravel() % 2
+    return np.flatnonzero(parity == 0), np.flatnonzero(parity == 1)
+
+# Metropolis acceptance probability for each value of s * (sum of neighbours)
+@lru_cache(maxsize=None)
+def acceptance_table(T):
+    # s * (sum of neighbours) is one of -4, -2, 0, 2, 4 -> table index (value + 4) // 2
+    local_field = np.arange(-4, 5, 2)
+    return np.minimum(1.0, np.exp(-2.0 * J * local_field / (kB * T)))
+
+# Checkerboard sweep that updates E and M locally
+def checkerboard_step(lattice, E, M, T, rng=None):
+    """
+    One full sweep: every even site is offered a flip at once, then every odd
+    site. Sites of one sublattice never neighbour each other, so all the flips
+    of a half-sweep are independent and their energy changes simply add up.
+
+    lattice: 2D array of spins (L must be even)
+    E: current total energy of the lattice
+    M: current total spin (sum of all spins)
+    T: temperature
+    rng: numpy Generator to draw from (default_rng if None)
+
+    Returns: updated (E, M)
+    """
+    rng = rng or default_rng
+    L = len(lattice)
+    table = acceptance_table(T)
+    spins = lattice.reshape(-1)  # flat view, flips are written straight into lattice
+
+    for sites in sublattice_sites(L):
+        local_field = spins[sites] * neighbor_sum(lattice).reshape(-1)[sites]
+        accept = rng.random(sites.size) < table[(local_field + 4) // 2]
+        flipped = sites[accept]
+
+        # Same bookkeeping as metropolis_step, summed over all accepted flips
+        E += 2.0 * J * np.sum(local_field[accept])
+        M += -2 * np.sum(spins[flipped])
+        spins[flipped] *= -1
+
+    return E, M
+
+# Flat indices of the four nearest neighbours of every site, shape (L*L, 4)
+@lru_cache(maxsize=None)
+def neighbor_table(L):
+    site = np.arange(L * L).reshape(L, L)
+    return np.stack([np.roll(site, 1, axis=0).ravel(), np.roll(site, -1, axis=0).ravel(),
+                     np.roll(site, 1, axis=1).ravel(), np.roll(site, -1, axis=1).ravel()], axis=1)
+
+# Probability of activating a bond between two parallel spins (Fortuin-Kasteleyn)
+def bond_probability(T):
+    return 1.0 - np.exp(-2.0 * J / (kB * T))
+
+# Wolff single-cluster step that updates E and M locally
+def wolff_step(lattice, E, M, T, rng=None):
+    """
+    Grows one cluster from a random seed and flips it. The cluster is grown
+    shell by shell on flat index arrays, so there is no Python recursion and
+    each shell is handled as one NumPy operation.
+
+    lattice: 2D array of spins
+    E: current total energy of the lattice
+    M: current total spin (sum of all spins)
+    T: temperature
+    rng: numpy Generator to draw from (default_rng if None)
+
+    Returns: updated (E, M)
+    """
+    rng = rng or default_rng
+    L = len(lattice)
+    neighbors = neighbor_table(L)
+    spins = lattice.reshape(-1)
+    p_add = bond_probability(T)
+
+    seed_site = rng.integers(0, L * L)
+    seed_spin = spins[seed_site]
+    in_cluster = np.zeros(L * L, dtype=bool)
+    in_cluster[seed_site] = True
+    frontier = np.array([seed_site])
+
+    while frontier.size:
+        # Every bond from the newest shell to a parallel spin outside the cluster gets one try
+        candidates = neighbors[frontier].ravel()
+        candidates = candidates[(spins[candidates] == seed_spin) & ~in_cluster[candidates]]
+        candidates = candidates[rng.random(candidates.size) < p_add]
+        frontier = np.unique(candidates)
+        in_cluster[frontier] = True
+
+    cluster = np.flatnonzero(in_cluster)
+
+    # Only bonds crossing the cluster boundary change sign when the cluster flips
+    outside = neighbors[cluster]
+    boundary = ~in_cluster[outside]
+    E += 2.0 * J * np.sum(spins[cluster][:, None] * spins[outside] * boundary)
+    M += -2 * seed_spin * cluster.size
+    spins[cluster] *= -1
+
+    return E, M
+
+# Swendsen-Wang multi-cluster sweep
+def swendsen_wang_step(lattice, E, M, T, rng=None):
+    """
+    Activates bonds between parallel neighbours, labels all clusters at once
+    with a sparse connected-components search and flips each cluster with
+    probability 1/2. So many spins change that E and M are recomputed from the
+    lattice (an O(L^2) array operation) instead of being tracked flip by flip.
+
+    lattice: 2D array of spins
+    E: current total energy of the lattice (replaced by the recomputed value)
+    M: current total spin (replaced by the recomputed value)
+    T: temperature
+    rng: numpy Generator to draw from (default_rng if None)
+
+    Returns: updated (E, M)
+    """
+    rng = rng or default_rng
+    L = len(lattice)
+    n_sites = L * L
+    neighbors = neighbor_table(L)
+    spins = lattice.reshape(-1)
+    p_add = bond_probability(T)
+
+    # Each bond once: towards the site below (column 1) and to the right (column 3)
+    site = np.repeat(np.arange(n_sites), 2)
+    other = neighbors[:, [1, 3]].ravel()
+    active = (spins[site] == spins[other]) & (rng.random(site.size) < p_add)
+
+    bonds = coo_matrix((np.ones(np.count_nonzero(active), dtype=np.int8),
+                        (site[active], other[active])), shape=(n_sites, n_sites))
+    n_clusters, labels = connected_components(bonds, directed=False)
+
+    flip = rng.random(n_clusters) < 0.5
+    spins[flip[labels]] *= -1
+
+    return calculate_total_energy(lattice), calculate_magnetization(lattice)
+
+# Available update schemes; every stepper has the signature (lattice, E, M, T, rng=None) -> (E, M)
+# "metropolis" does one single-spin attempt per step, "metropolis-sweep", "checkerboard" and
+# "swendsen-wang" one full sweep per step, "wolff" one cluster flip per step
+UPDATE_METHODS = {
+    "metropolis": metropolis_step,
+    "metropolis-sweep": metropolis_sweep,
+    "checkerboard": checkerboard_step,
+    "wolff": wolff_step,
+    "swendsen-wang": swendsen_wang_step,
+}
+
+def simulate_ising(T_range, L=L, method="metropolis", eq_steps=eq_steps, n_steps=n_steps,
+                   record_histograms=False, record_errors=False, target_error=None, seed=seed):
+    """
+    Runs one Markov chain per temperature in T_range.
+
+    Temperature k draws from its own random stream (base seed, key k), so a
+    given seed reproduces every temperature exactly.
+
+    With target_error set, the measurement at each temperature stops as soon
+    as the relative error bars of E, |M|, C_v and chi are all below it
+    (checked every check_every steps); n_steps is then only an upper limit.
+
+    The magnetization measured is <|M|> per spin for every method: the sign
+    of M is lost by a cluster flip (and by a long enough single-spin run), so
+    only |M| has a useful average below Tc.
+
+    Returns: (magnetizations, energies, energy_squares, configs), followed by
+             - a histograms dict when record_histograms is True. histograms[T]
+               holds the visited energy levels "E", how often each was sampled
+               ("counts") and the summed |M| at each level ("absM"), for
+               reweighting.py.
+             - an errors dict when record_errors is True. errors[T] is the
+               IsingAccumulator.estimates() dict (error bars, tau_int).
+    """
     magnetizations = []
     energies = []
     energy_squares = []
     configs = {}
+    histograms = {}
+    errors = {}
+    step_fn = UPDATE_METHODS[method]
+    streams = spawn_generators(resolve_seed(seed), len(T_range))
 
-    for T in T_range:
+    # Energies are -2*N*|J| + 4*|J|*k for k = 0..N, so each level gets one histogram bin
+    E_spacing = 4.0 * abs(J)
+    E_offset = 2.0 * abs(J) * L * L
+
+    for T, rng in zip(T_range, streams):
         # Initialize lattice and calculate initial E, M
-        lattice = initialize_lattice(L)
+        lattice = initialize_lattice(L, rng)
         E = calculate_total_energy(lattice)
-        M = np.sum(lattice)  # total spin
+        M = calculate_magnetization(lattice)  # total spin
 
         # Equilibration phase (discard these steps)
         for _ in range(eq_steps):
-            E, M = metropolis_step(lattice, E, M, T)
+            E, M = step_fn(lattice, E, M, T, rng)
 
         # Reset accumulators
         E_total = 0.0
         E2_total = 0.0
         M_total = 0.0
+        E_counts = np.zeros(L * L + 1, dtype=np.int64)
+        M_sums = np.zeros(L * L + 1)
+        accumulator = IsingAccumulator(L, T, kB) if (record_errors or target_error) else None
+        n_measured = 0
 
         # Measurement phase
         for step in range(n_steps):
-            E, M = metropolis_step(lattice, E, M, T)
+            E, M = step_fn(lattice, E, M, T, rng)
 
-            # Accumulate E, E^2, and M for averaging
+            # Accumulate E, E^2, and |M| for averaging
+            # (cluster updates flip whole ordered domains, so the sign of M averages out)
             E_total += E
             E2_total += E * E
-            M_total += M
+            M_total += abs(M)
+            n_measured += 1
+
+            if record_histograms:
+                level = int(round((E + E_offset) / E_spacing))
+                E_counts[level] += 1
+                M_sums[level] += abs(M)
 
             # Store a configuration snapshot at midpoint
             if step == n_steps // 2:
                 configs[T] = lattice.copy()
 
-        # Compute average energy, average energy^2, and average magnetization
-        avg_E = E_total / n_steps
-        avg_E2 = E2_total / n_steps
-        avg_M = M_total / n_steps / (L * L)  # normalize M by L^2
+            if accumulator is not None:
+                accumulator.add(E, M)
+                if (target_error and n_measured % check_every == 0
+                        and accumulator.is_precise(target_error)):
+                    break
+
+        # A run that stopped early may not have reached its midpoint snapshot
+        if T not in configs:
+            configs[T] = lattice.copy()
+
+        # Compute average energy, average energy^2, and average |magnetization|
+        avg_E = E_total / n_measured
+        avg_E2 = E2_total / n_measured
+        avg_M = M_total / n_measured / (L * L)  # normalize |M| by L^2
 
         magnetizations.append(avg_M)
         energies.append(avg_E)
         energy_squares.append(avg_E2)
 
-    return np.array(magnetizations), np.array(energies), np.array(energy_squares), configs
+        if record_histograms:
+            visited = np.flatnonzero(E_counts)
+            histograms[T] = {"E": visited * E_spacing - E_offset,
+                             "counts": E_counts[visited],
+                             "absM": M_sums[visited]}
+
+        if record_errors:
+            errors[T] = dict(accumulator.estimates(), n_samples=n_measured)
+
+    results = np.array(magnetizations), np.array(energies), np.array(energy_squares), configs
+    if record_histograms:
+        results += (histograms,)
+    if record_errors:
+        results += (errors,)
+    return results
 
 # Main execution
-temperatures = np.linspace(T_min, T_max, n_temp)
-magnetizations, energies, energy_squares, configs = simulate_ising(temperatures)
-
-# Compute specific heat, normalized by L^2
-specific_heat = (energy_squares - energies**2) / (kB * temperatures**2 * (L**2))
-
-# --- Plotting ---
-
-# 1. Magnetization vs Temperature
-plt.figure(figsize=(6, 5))
-plt.plot(temperatures, magnetizations, 'b.-')
-plt.xlabel('Temperature (T)')
-plt.ylabel('Magnetization per spin (M)')
-plt.title('Magnetization vs Temperature')
-plt.grid(True)
-plt.show()
-
-# 2. Specific Heat vs Temperature
-plt.figure(figsize=(6, 5))
-plt.plot(temperatures, specific_heat, 'r.-')
-plt.xlabel('Temperature (T)')
-plt.ylabel('Specific Heat (C_v)')
-plt.title('Specific Heat vs Temperature')
-plt.grid(True)
-plt.show()
-
-# 3. Spin Configurations at Selected Temperatures
-selected_temps = np.array([1.5, 2.3, 4.0])
-selected_temps = [temperatures[np.argmin(np.abs(temperatures - T))] for T in selected_temps]
-
-for T in selected_temps:
-    plt.figure(figsize=(4, 4))
-    config = configs[T]
-    plt.imshow(config, cmap='gray', interpolation='none')
-    plt.title(f'Spins at T = {T}')
-    plt.axis('off')
-    plt.show()
-
-# --- Output Analysis ---
-print("\nAnalysis:")
-print("(a) Magnetization per spin vs. Temperature:")
-print("   - Magnetization is high (close to ±1) at low temperatures (ordered phase).")
-print("   - Near Tc (≈ 2.269), magnetization drops sharply to near zero (disordered phase).")
-print("   - Indicates a phase transition from ferromagnetic to paramagnetic behavior.")
-
-print("(b) Spin Configurations:")
-print("   - At low T (e.g., 1.5), spins are mostly aligned (ferromagnetic).")
-print("   - Near Tc (e.g., 2.3), domain structures form.")
-print("   - At high T (e.g., 4.0), spins are randomly oriented (paramagnetic).")
-
-print("(c) Specific Heat:")
-print("   - Specific heat peaks near Tc (≈ 2.269), indicating a phase transition.")
-print("   - The peak arises from large energy fluctuations near the critical point.")
+if __name__ == "__main__":
+    temperatures = np.linspace(T_min, T_max, n_temp)
+    magnetizations, energies, energy_squares, configs = simulate_ising(temperatures, method=update_method,
+                                                                       seed=seed)
+
+    # Compute specific heat, normalized by L^2
+    specific_heat = (energy_squares - energies**2) / (kB * temperatures**2 * (L**2))
+
+    # --- Plotting ---
+    # Written to files (no display needed); the figures are independent, so they render in parallel
+    selected_temps = np.array([1.5, 2.3, 4.0])
+    selected_temps = [temperatures[np.argmin(np.abs(temperatures - T))] for T in selected_temps]
+
+    jobs = [
+        # 1. |Magnetization| vs Temperature
+        curve_job('mag_temp.png', temperatures, magnetizations, 'b.-', 'Temperature (T)',
+                  'Absolute magnetization per spin <|M|>', 'Absolute Magnetization vs Temperature'),
+        # 2. Specific Heat vs Temperature
+        curve_job('cv_temp.png', temperatures, specific_heat, 'r.-', 'Temperature (T)',
+                  'Specific Heat (C_v)', 'Specific Heat vs Temperature'),
+    ]
+    # 3. Spin Configurations at Selected Temperatures (block-averaged when L is large)
+    jobs += [snapshot_job(f'spins_t{k}.png', configs[T], T) for k, T in enumerate(selected_temps, 1)]
+
+    for path in render_figures(jobs):
+        print(f"Saved {path}")
+
+    # --- Output Analysis ---
+    print("\nAnalysis:")
+    print("(a) Absolute magnetization per spin <|M|> vs. Temperature:")
+    print("   - <|M|> is high (close to 1) at low temperatures (ordered phase).")
+    print("   - Near Tc (≈ 2.269), magnetization drops sharply to near zero (disordered phase).")
+    print("   - Indicates a phase transition from ferromagnetic to paramagnetic behavior.")
+
+    print("(b) Spin Configurations:")
+    print("   - At low T (e.g., 1.5), spins are mostly aligned (ferromagnetic).")
+    print("   - Near Tc (e.g., 2.3), domain structures form.")
+    print("   - At high T (e.g., 4.0), spins are randomly oriented (paramagnetic).")
+
+    print("(c) Specific Heat:")
+    print("   - Specific heat peaks near Tc (≈ 2.269), indicating a phase transition.")
+    print("   - The peak arises from large energy fluctuations near the critical point.")
@@ -0,0 +1,156 @@
+import numpy as np
+
+# Constants
+min_blocks = 32  # Fewest blocks an error estimate may be based on
+
+class BinningAnalysis:
+    """
+    Online blocking (binning) analysis of a vector-valued time series.
+
+    Level k sees the means of consecutive blocks of 2^k samples. Each level
+    only keeps its count, sum, sum of outer products and one half-filled
+    block, so memory grows as O(log n) however long the run is.
+    """
+
+    def __init__(self, dim):
+        self.dim = dim
+        self.counts = []
+        self.sums = []
+        self.outer_sums = []
+        self.pending = []
+
+    def add(self, x):
+        x = np.asarray(x, dtype=float)
+        level = 0
+        while x is not None:
+            if level == len(self.counts):
+                self.counts.append(0)
+                self.sums.append(np.zeros(self.dim))
+                self.outer_sums.append(np.zeros((self.dim, self.dim)))
+                self.pending.append(None)
+
+            self.counts[level] += 1
+            self.sums[level] += x
+            self.outer_sums[level] += np.outer(x, x)
+
+            # Pair this block with the waiting one and pass the mean one level up
+            if self.pending[level] is None:
+                self.pending[level], x = x, None
+            else:
+                x = 0.5 * (self.pending[level] + x)
+                self.pending[level] = None
+            level += 1
+
+    @property
+    def n_samples(self):
+        return self.counts[0] if self.counts else 0
+
+    # Plain arrays describing the full state, e.g. for np.savez (see checkpoint.py)
+    def to_arrays(self):
+        levels = len(self.counts)
+        pending = np.full((levels, self.dim), np.nan)
+        has_pending = np.zeros(levels, dtype=bool)
+        for k, block in enumerate(self.pending):
+            if block is not None:
+                pending[k], has_pending[k] = block, True
+        return {
+            "counts": np.array(self.counts, dtype=np.int64),
+            "sums": np.array(self.sums).reshape(levels, self.dim),
+            "outer_sums": np.array(self.outer_sums).reshape(levels, self.dim, self.dim),
+            "pending": pending,
+            "has_pending": has_pending,
+        }
+
+    @classmethod
+    def from_arrays(cls, dim, arrays):
+        binning = cls(dim)
+        binning.counts = [int(n) for n in arrays["counts"]]
+        binning.sums = [row.copy() for row in arrays["sums"]]
+        binning.outer_sums = [block.copy() for block in arrays["outer_sums"]]
+        binning.pending = [row.copy() if flag else None
+                           for row, flag in zip(arrays["pending"], arrays["has_pending"])]
+        return binning
+
+    def mean(self):
+        return self.sums[0] / self.counts[0]
+
+    # Covariance of the mean, estimated from the block means at one level
+    def covariance_of_mean(self, level):
+        n = self.counts[level]
+        block_mean = self.sums[level] / n
+        cov = (self.outer_sums[level] / n - np.outer(block_mean, block_mean)) * n / (n - 1)
+        return cov / n
+
+    # Highest level that still has at least min_blocks blocks
+    def plateau_level(self, min_blocks=min_blocks):
+        usable = [k for k, n in enumerate(self.counts) if n >= min_blocks]
+        return usable[-1] if usable else 0
+
+    def errors(self, min_blocks=min_blocks):
+        return np.sqrt(np.diag(self.covariance_of_mean(self.plateau_level(min_blocks))))
+
+    # Integrated autocorrelation time of every component, in samples
+    def tau_int(self, min_blocks=min_blocks):
+        naive = np.diag(self.covariance_of_mean(0))
+        blocked = np.diag(self.covariance_of_mean(self.plateau_level(min_blocks)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(naive > 0, 0.5 * blocked / naive, 0.5)
+
+# Keys of IsingAccumulator.estimates(), in a fixed order for tabular storage
+ESTIMATE_KEYS = ("E", "E_err", "absM", "absM_err", "C_v", "C_v_err", "chi", "chi_err", "tau_E", "tau_M")
+
+class IsingAccumulator:
+    """
+    Streams (E, M) samples of one temperature and reports <E>, <|M|>, C_v and
+    chi per spin with blocking error bars. Errors of C_v and chi come from
+    the delta method on the blocked covariance of (E, E^2, |M|, M^2).
+    """
+
+    def __init__(self, L, T, kB=1.0, min_blocks=min_blocks):
+        self.N = L * L
+        self.kB = kB
+        self.beta = 1.0 / (kB * T)
+        self.min_blocks = min_blocks
+        self.binning = BinningAnalysis(4)
+
+    def add(self, E, M):
+        self.binning.add((E, E * E, abs(M), M * M))
+
+    @property
+    def n_samples(self):
+        return self.binning.n_samples
+
+    def estimates(self):
+        """
+        Returns: dict with E, absM, C_v, chi (per spin), their *_err error bars
+                 and tau_E, tau_M (integrated autocorrelation times in samples)
+        """
+        E, E2, absM, M2 = self.binning.mean()
+        level = self.binning.plateau_level(self.min_blocks)
+        cov = self.binning.covariance_of_mean(level)
+        N, beta = self.N, self.beta
+
+        # Gradients of C_v and chi with respect to the means (E, E^2, |M|, M^2)
+        grad_cv = np.array([-2.0 * E, 1.0, 0.0, 0.0]) * self.kB * beta**2 / N
+        grad_chi = np.array([0.0, 0.0, -2.0 * absM, 1.0]) * beta / N
+        tau = self.binning.tau_int(self.min_blocks)
+
+        return {
+            "E": E / N,
+            "E_err": np.sqrt(cov[0, 0]) / N,
+            "absM": absM / N,
+            "absM_err": np.sqrt(cov[2, 2]) / N,
+            "C_v": self.kB * beta**2 * (E2 - E * E) / N,
+            "C_v_err": np.sqrt(max(grad_cv @ cov @ grad_cv, 0.0)),
+            "chi": beta * (M2 - absM * absM) / N,
+            "chi_err": np.sqrt(max(grad_chi @ cov @ grad_chi, 0.0)),
+            "tau_E": tau[0],
+            "tau_M": tau[2],
+        }
+
+    # True once every relative error bar is below target
+    def is_precise(self, target):
+        if self.binning.counts[self.binning.plateau_level(self.min_blocks)] < self.min_blocks:
+            return False
+        est = self.estimates()
+        return all(est[f"{name}_err"] <= target * abs(est[name]) for name in ("E", "absM", "C_v", "chi"))
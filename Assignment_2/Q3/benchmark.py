@@ -0,0 +1,174 @@
+import argparse
+import importlib
+import json
+import os
+import platform
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from scipy.special import ellipk
+
+import bitpacked
+from random_streams import make_generator
+
+# 2d_ising.py is not a valid identifier, so it has to be imported by name
+ising = importlib.import_module("2d_ising")
+
+# Constants
+L_values = [16, 32, 64, 128, 256, 512, 1024]
+quick_L_values = [16, 64, 256]
+T_bench = 2.269          # Throughput is measured at Tc, where cluster sizes are largest
+T_equilibrium = 3.0      # Temperature of the time-to-equilibrium test
+equilibrium_tol = 0.01   # Equilibrated once E per spin is within 1% of Onsager's value
+time_budget = 1.0        # Seconds spent on each throughput measurement
+equilibrium_budget = 10.0  # Give up on time-to-equilibrium after this many seconds
+regression_tol = 0.2     # Flag a case when it is more than 20% slower than the baseline
+results_file = "benchmark_results.json"
+baseline_file = "benchmark_baseline.json"
+seed = 12345
+
+# Every update mode: (initializer, energy, magnetization, stepper, predicate on L)
+def update_modes():
+    modes = {name: (ising.initialize_lattice, ising.calculate_total_energy,
+                    ising.calculate_magnetization, step_fn, lambda L: True)
+             for name, step_fn in ising.UPDATE_METHODS.items()}
+    modes["bitpacked"] = (bitpacked.initialize_packed_lattice, bitpacked.packed_energy,
+                          bitpacked.packed_magnetization, bitpacked.packed_checkerboard_step,
+                          lambda L: L % bitpacked.WORD == 0)
+    return modes
+
+# Spin-flip attempts made by one step of a method (Wolff: the cluster size)
+def attempts_per_step(method, L, M_before, M_after):
+    if method == "metropolis":
+        return 1
+    if method == "wolff":
+        return abs(M_after - M_before) // 2
+    return L * L
+
+# Exact energy per spin of the infinite square lattice (Onsager)
+def onsager_energy(T):
+    K = ising.J / (ising.kB * T)
+    k = 2.0 * np.sinh(2 * K) / np.cosh(2 * K) ** 2
+    return -ising.J / np.tanh(2 * K) * (1 + 2 / np.pi * (2 * np.tanh(2 * K) ** 2 - 1) * ellipk(k**2))
+
+def measure_throughput(method, L, mode, budget=time_budget):
+    """
+    Returns: (attempts per second, seconds per step) at T_bench, from as many
+             steps as fit in budget seconds (after one warm-up step)
+    """
+    init, energy, magnetization, step_fn, _ = mode
+    rng = make_generator(seed, (L,))
+    lattice = init(L, rng)
+    E, M = energy(lattice), magnetization(lattice)
+    E, M = step_fn(lattice, E, M, T_bench, rng)
+
+    steps = attempts = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < budget:
+        M_before = M
+        E, M = step_fn(lattice, E, M, T_bench, rng)
+        attempts += attempts_per_step(method, L, M_before, M)
+        steps += 1
+    elapsed = time.perf_counter() - start
+    return attempts / elapsed, elapsed / steps
+
+def measure_equilibration(method, L, mode, budget=equilibrium_budget):
+    """
+    Wall time for a random start at T_equilibrium to come within
+    equilibrium_tol of the exact energy, or None if it takes over budget.
+    """
+    init, energy, magnetization, step_fn, _ = mode
+    rng = make_generator(seed, (L, 1))
+    lattice = init(L, rng)
+    E, M = energy(lattice), magnetization(lattice)
+    target = onsager_energy(T_equilibrium) * (1 - equilibrium_tol) * L * L
+
+    # Check the energy only every so many steps so single-spin modes are not dominated by it
+    check = max(1, L * L // 16) if method == "metropolis" else 1
+    start = time.perf_counter()
+    while E > target:
+        for _ in range(check):
+            E, M = step_fn(lattice, E, M, T_equilibrium, rng)
+        if time.perf_counter() - start > budget:
+            return None
+    return time.perf_counter() - start
+
+def run_benchmarks(L_values=L_values, methods=None):
+    modes = update_modes()
+    results = []
+    for method in methods or modes:
+        mode = modes[method]
+        for L in L_values:
+            if not mode[4](L):
+                continue
+            rate, seconds_per_step = measure_throughput(method, L, mode)
+            results.append({
+                "method": method,
+                "L": L,
+                "attempts_per_second": rate,
+                "seconds_per_step": seconds_per_step,
+                "time_to_equilibrium": measure_equilibration(method, L, mode),
+                # wall time of one simulate_ising temperature point with the default step budgets
+                "projected_seconds_per_temperature": seconds_per_step * (ising.eq_steps + ising.n_steps),
+            })
+            print(f"{method:>14s}  L={L:5d}  {rate:12.4g} flips/s  "
+                  f"{seconds_per_step * 1e3:10.3f} ms/step")
+    return results
+
+def machine_info():
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def save_results(path, results):
+    with open(path, "w") as f:
+        json.dump({"machine": machine_info(), "results": results}, f, indent=2)
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+# Cases that got slower than the baseline by more than tolerance
+def find_regressions(results, baseline, tolerance=regression_tol):
+    reference = {(r["method"], r["L"]): r["attempts_per_second"] for r in baseline}
+    regressions = []
+    for r in results:
+        before = reference.get((r["method"], r["L"]))
+        if before and r["attempts_per_second"] < (1 - tolerance) * before:
+            regressions.append({"method": r["method"], "L": r["L"], "baseline": before,
+                                "now": r["attempts_per_second"],
+                                "change": r["attempts_per_second"] / before - 1})
+    return regressions
+
+# Main execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput benchmarks of the Ising update modes")
+    parser.add_argument("--quick", action="store_true", help=f"only L in {quick_L_values}")
+    parser.add_argument("--methods", nargs="+", help="update modes to run (default: all)")
+    parser.add_argument("--output", default=results_file)
+    parser.add_argument("--baseline", default=baseline_file)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store this run as the new baseline instead of comparing")
+    args = parser.parse_args()
+
+    results = run_benchmarks(quick_L_values if args.quick else L_values, args.methods)
+    save_results(args.output, results)
+
+    if args.update_baseline:
+        save_results(args.baseline, results)
+        print(f"\nBaseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        regressions = find_regressions(results, load_results(args.baseline))
+        for r in regressions:
+            print(f"REGRESSION  {r['method']:>14s}  L={r['L']:5d}  {r['change']:+.1%} "
+                  f"({r['baseline']:.4g} -> {r['now']:.4g} flips/s)")
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}")
+        raise SystemExit(1 if regressions else 0)
+    else:
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one")
@@ -0,0 +1,210 @@
+import importlib
+
+import numpy as np
+
+from random_streams import resolve_seed, spawn_generators
+
+# 2d_ising.py is not a valid identifier, so it has to be imported by name
+ising = importlib.import_module("2d_ising")
+
+# Constants
+WORD = 64                 # Spins per machine word
+random_bits = 32          # Maximum precision (in bits) of the packed Bernoulli draws
+EVEN_BITS = np.uint64(0x5555555555555555)
+ODD_BITS = np.uint64(0xAAAAAAAAAAAAAAAA)
+ALL_BITS = np.uint64(0xFFFFFFFFFFFFFFFF)
+ONE, SIXTY_THREE = np.uint64(1), np.uint64(63)
+
+# Layout: spins[i, j] lives in bit (j % 64) of words[i, j // 64]; a set bit is a -1 spin.
+
+# Number of set bits per word (np.bitwise_count needs NumPy >= 2.0)
+if hasattr(np, "bitwise_count"):
+    def popcount(words):
+        return np.bitwise_count(words)
+else:
+    _BYTE_COUNTS = np.array([bin(b).count("1") for b in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        words = np.ascontiguousarray(words)
+        return _BYTE_COUNTS[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1)
+
+def check_size(L):
+    if L % WORD:
+        raise ValueError(f"packed lattices need L to be a multiple of {WORD}, got L = {L}")
+
+# Convert between the int spin lattice of 2d_ising.py and the packed form
+def pack(lattice):
+    L = len(lattice)
+    check_size(L)
+    bits = np.packbits(np.asarray(lattice) < 0, axis=1, bitorder="little")
+    return bits.view("<u8").astype(np.uint64)
+
+def unpack(words):
+    L = len(words)
+    bytes_ = np.ascontiguousarray(words.astype("<u8")).view(np.uint8)
+    bits = np.unpackbits(bytes_, axis=1, bitorder="little")[:, :L]
+    return 1 - 2 * bits.astype(np.int8)
+
+# Uniformly random words (every bit +1 or -1 with probability 1/2)
+def random_words(shape, rng):
+    return rng.integers(0, np.iinfo(np.uint64).max, size=shape, dtype=np.uint64, endpoint=True)
+
+# Initialize packed lattice with random spins
+def initialize_packed_lattice(L, rng=None):
+    check_size(L)
+    return random_words((L, L // WORD), rng or ising.default_rng)
+
+# Neighbour words: bit b of each result holds the neighbour of bit b in words
+def shift_up(words):
+    return np.roll(words, -1, axis=0)
+
+def shift_down(words):
+    return np.roll(words, 1, axis=0)
+
+def shift_right(words):
+    # neighbour at column j + 1: next bit, or bit 0 of the following word
+    return (words >> ONE) | (np.roll(words, -1, axis=1) << SIXTY_THREE)
+
+def shift_left(words):
+    # neighbour at column j - 1: previous bit, or bit 63 of the preceding word
+    return (words << ONE) | (np.roll(words, 1, axis=1) >> SIXTY_THREE)
+
+# Energy and magnetization reduced directly on the packed form
+def packed_energy(words):
+    L = len(words)
+    antiparallel = (np.sum(popcount(words ^ shift_right(words)), dtype=np.int64) +
+                    np.sum(popcount(words ^ shift_up(words)), dtype=np.int64))
+    # 2N bonds, each -J if parallel and +J if antiparallel
+    return -ising.J * (2 * L * L - 2 * int(antiparallel))
+
+def packed_magnetization(words):
+    L = len(words)
+    return L * L - 2 * int(np.sum(popcount(words), dtype=np.int64))
+
+# Words whose bits in mask are independently set with probability p (others clear)
+def bernoulli_words(p, mask, rng):
+    if p >= 1.0:
+        return mask.copy()
+    result = np.zeros_like(mask)
+    if p <= 0.0:
+        return result
+
+    # Compare a random binary fraction 0.u1u2u3... against p bit by bit, 64 sites at a
+    # time; random words are only drawn for the words that still hold undecided sites,
+    # and each bit of u decides about half of those left
+    flat = result.reshape(-1)
+    undecided = mask.reshape(-1).copy()
+    active = np.flatnonzero(undecided)
+    for _ in range(random_bits):
+        if active.size == 0:
+            break
+        p *= 2
+        p_bit, p = (p >= 1.0), p - (p >= 1.0)
+        u = random_words(active.size, rng)
+        if p_bit:
+            flat[active] |= undecided[active] & ~u
+            undecided[active] &= u
+        else:
+            undecided[active] &= ~u
+        active = active[undecided[active] != 0]
+    return result
+
+# Per-bit count (0..4) of antiparallel neighbours, as bit planes
+def antiparallel_count(words):
+    a = words ^ shift_up(words)
+    b = words ^ shift_down(words)
+    c = words ^ shift_left(words)
+    d = words ^ shift_right(words)
+
+    # Bit-sliced adder: a + b + c + d = 4 * fours + 2 * twos + ones
+    s1, c1 = a ^ b, a & b
+    s2, c2 = c ^ d, c & d
+    ones, carry = s1 ^ s2, s1 & s2
+    twos = c1 ^ c2 ^ carry
+    fours = (c1 & c2) | (carry & (c1 ^ c2))
+    return ones, twos, fours
+
+# Masks of the sites with exactly k antiparallel neighbours, k = 0..4
+def count_masks(ones, twos, fours):
+    return [(ones if k & 1 else ~ones) & (twos if k & 2 else ~twos) & (fours if k & 4 else ~fours)
+            for k in range(5)]
+
+# Multi-spin-coded checkerboard Metropolis sweep that updates E and M locally
+def packed_checkerboard_step(words, E, M, T, rng=None):
+    """
+    Same update as checkerboard_step in 2d_ising.py, 64 spins per word op.
+    A site with k antiparallel neighbours has dE = 2 * J * (4 - 2k) when
+    flipped, so the acceptance test only needs the bit-sliced count k.
+
+    words: packed lattice (modified in place)
+    E: current total energy of the lattice
+    M: current total spin (sum of all spins)
+    T: temperature
+    rng: numpy Generator to draw from (default_rng of 2d_ising.py if None)
+
+    Returns: updated (E, M)
+    """
+    rng = rng or ising.default_rng
+    rows = np.arange(len(words)) % 2
+    dE_k = 2.0 * ising.J * (4 - 2 * np.arange(5))
+    accept_k = np.minimum(1.0, np.exp(-dE_k / (ising.kB * T)))
+
+    for parity in (0, 1):
+        # even sites (i + j even) sit on even bits of even rows and odd bits of odd rows
+        sublattice = np.where(rows == parity, EVEN_BITS, ODD_BITS)[:, None]
+        masks = count_masks(*antiparallel_count(words))
+
+        flip = np.zeros_like(words)
+        for k in range(5):
+            flip |= bernoulli_words(accept_k[k], masks[k] & sublattice, rng)
+
+        # -1 -> +1 flips (set bits) raise M by 2, +1 -> -1 flips lower it by 2
+        flipped_down = int(np.sum(popcount(flip & words), dtype=np.int64))
+        flipped_up = int(np.sum(popcount(flip & ~words), dtype=np.int64))
+        for k in range(5):
+            E += dE_k[k] * int(np.sum(popcount(flip & masks[k]), dtype=np.int64))
+        M += 2 * flipped_down - 2 * flipped_up
+
+        words ^= flip
+
+    return E, M
+
+def simulate_packed(T_range, L, eq_steps=ising.eq_steps, n_steps=ising.n_steps, seed=ising.seed):
+    """
+    simulate_ising on packed lattices (one checkerboard sweep per step).
+
+    Returns: (magnetizations, energies, energy_squares, configs) like
+             simulate_ising, except that configs holds packed words; call
+             unpack() on the ones you want to plot.
+    """
+    magnetizations = []
+    energies = []
+    energy_squares = []
+    configs = {}
+
+    for T, rng in zip(T_range, spawn_generators(resolve_seed(seed), len(T_range))):
+        words = initialize_packed_lattice(L, rng)
+        E = packed_energy(words)
+        M = packed_magnetization(words)
+
+        for _ in range(eq_steps):
+            E, M = packed_checkerboard_step(words, E, M, T, rng)
+
+        E_total = 0.0
+        E2_total = 0.0
+        M_total = 0.0
+
+        for step in range(n_steps):
+            E, M = packed_checkerboard_step(words, E, M, T, rng)
+            E_total += E
+            E2_total += E * E
+            M_total += abs(M)
+
+            if step == n_steps // 2:
+                configs[T] = words.copy()
+
+        magnetizations.append(M_total / n_steps / (L * L))
+        energies.append(E_total / n_steps)
+        energy_squares.append(E2_total / n_steps)
+
+    return np.array(magnetizations), np.array(energies), np.array(energy_squares), configs
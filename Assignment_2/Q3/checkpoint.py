@@ -0,0 +1,215 @@
+import importlib
+import os
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from accumulator import ESTIMATE_KEYS, BinningAnalysis, IsingAccumulator
+from random_streams import generator_state, make_generator, resolve_seed, restore_generator
+
+# 2d_ising.py is not a valid identifier, so it has to be imported by name
+ising = importlib.import_module("2d_ising")
+
+# Constants
+checkpoint_every = 5000  # Monte Carlo steps between checkpoints
+checkpoint_file = "ising_checkpoint.npz"
+snapshot_file = "ising_snapshots.npy"
+
+# ----------------------- Snapshot Archive --------------------------------------
+class SnapshotArchive:
+    """
+    Spin configurations of a sweep in one memory-mapped int8 .npy file of
+    shape (n_temp, L, L), so snapshots live on disk instead of in RAM. The
+    temperatures are kept next to it in <name>.temps.npy.
+
+    resume: reopen an existing archive of the same temperatures and L (a
+            resumed sweep); otherwise, or if the archive on disk belongs to
+            another sweep, a new one is created in its place
+    """
+
+    def __init__(self, path, temperatures, L, resume=False):
+        self.path = path
+        self.temps_path = os.path.splitext(path)[0] + ".temps.npy"
+        self.temperatures = np.asarray(temperatures, dtype=float)
+        shape = (len(self.temperatures), L, L)
+        if resume and self.matches(shape):
+            self.spins = open_memmap(path, mode="r+")
+        else:
+            self.spins = open_memmap(path, mode="w+", dtype=np.int8, shape=shape)
+            np.save(self.temps_path, self.temperatures)
+
+    # True if the archive on disk has this shape and these temperatures
+    def matches(self, shape):
+        if not (os.path.exists(self.path) and os.path.exists(self.temps_path)):
+            return False
+        spins = np.load(self.path, mmap_mode="r")
+        stored = np.load(self.temps_path)
+        return spins.shape == shape and spins.dtype == np.int8 and np.array_equal(stored, self.temperatures)
+
+    def store(self, index, lattice):
+        self.spins[index] = lattice
+        self.spins.flush()
+
+    # Read-only {T: lattice} view in the same shape as simulate_ising's configs
+    def as_configs(self):
+        return {T: self.spins[k] for k, T in enumerate(self.temperatures)}
+
+def load_snapshots(path):
+    spins = np.load(path, mmap_mode="r")
+    temperatures = np.load(os.path.splitext(path)[0] + ".temps.npy")
+    return {T: spins[k] for k, T in enumerate(temperatures)}
+
+# ----------------------- Checkpoint File --------------------------------------
+def save_checkpoint(path, state):
+    """
+    Writes the state dict to a compressed .npz. The file is written under a
+    temporary name and then renamed, so a crash mid-write never destroys the
+    previous checkpoint.
+    """
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(tmp_path, **state)
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path):
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+# ----------------------- Resumable Sweep --------------------------------------
+def new_sweep_state(T_range, L, method, eq_steps, n_steps, snapshot_path, seed):
+    n_temp = len(T_range)
+    return {
+        # the base seed can exceed 64 bits, so it is stored as text
+        "seed": str(resolve_seed(seed)),
+        "T_range": np.asarray(T_range, dtype=float), "L": L, "method": method,
+        "eq_steps": eq_steps, "n_steps": n_steps, "snapshot_path": snapshot_path,
+        "t_index": 0, "step": 0,
+        "magnetizations": np.full(n_temp, np.nan),
+        "energies": np.full(n_temp, np.nan),
+        "energy_squares": np.full(n_temp, np.nan),
+        "estimates": np.full((n_temp, len(ESTIMATE_KEYS)), np.nan),
+    }
+
+def continue_sweep(state, checkpoint_path, checkpoint_every=checkpoint_every):
+    """
+    Runs (or carries on with) the sweep described by state, saving the
+    lattice, generator state, E, M, running sums and accumulator every
+    checkpoint_every steps and after every temperature. Temperature k uses
+    the stream (seed, k), as in simulate_ising.
+
+    Returns: (magnetizations, energies, energy_squares, configs, errors) like
+             simulate_ising(..., record_errors=True), with configs read from
+             the memory-mapped snapshot archive.
+    """
+    T_range = state["T_range"]
+    L = int(state["L"])
+    eq_steps, n_steps = int(state["eq_steps"]), int(state["n_steps"])
+    step_fn = ising.UPDATE_METHODS[str(state["method"])]
+    seed = int(str(state["seed"]))
+    resuming = "lattice" in state or int(state["t_index"]) > 0
+    archive = SnapshotArchive(str(state["snapshot_path"]), T_range, L, resume=resuming)
+
+    # Initialize stream, lattice, E, M and accumulators for a fresh temperature
+    def start_temperature(k):
+        rng = make_generator(seed, (k,))
+        lattice = ising.initialize_lattice(L, rng)
+        E = ising.calculate_total_energy(lattice)
+        M = ising.calculate_magnetization(lattice)
+        return rng, lattice, E, M, 0.0, 0.0, 0.0, IsingAccumulator(L, T_range[k], ising.kB)
+
+    t_index, step = int(state["t_index"]), int(state["step"])
+    if "lattice" in state:
+        rng = restore_generator(str(state["rng_state"]))
+        lattice = state["lattice"].astype(np.int64)
+        E, M = float(state["E"]), int(state["M"])
+        E_total, E2_total, M_total = (float(state[key]) for key in ("E_total", "E2_total", "M_total"))
+        accumulator = IsingAccumulator(L, T_range[min(t_index, len(T_range) - 1)], ising.kB)
+        accumulator.binning = BinningAnalysis.from_arrays(
+            4, {key[4:]: state[key] for key in state if key.startswith("acc_")})
+    elif t_index < len(T_range):
+        rng, lattice, E, M, E_total, E2_total, M_total, accumulator = start_temperature(t_index)
+
+    def checkpoint():
+        state.update(t_index=t_index, step=step)
+        if t_index < len(T_range):
+            state.update(lattice=lattice.astype(np.int8), E=E, M=M, rng_state=generator_state(rng),
+                         E_total=E_total, E2_total=E2_total, M_total=M_total)
+            state.update({"acc_" + key: value for key, value in accumulator.binning.to_arrays().items()})
+        save_checkpoint(checkpoint_path, state)
+
+    while t_index < len(T_range):
+        T = T_range[t_index]
+
+        while step < eq_steps + n_steps:
+            E, M = step_fn(lattice, E, M, T, rng)
+
+            # Measurement phase starts after eq_steps
+            if step >= eq_steps:
+                E_total += E
+                E2_total += E * E
+                M_total += abs(M)
+                accumulator.add(E, M)
+                if step - eq_steps == n_steps // 2:
+                    archive.store(t_index, lattice)
+
+            step += 1
+            if step % checkpoint_every == 0:
+                checkpoint()
+
+        state["magnetizations"][t_index] = M_total / n_steps / (L * L)
+        state["energies"][t_index] = E_total / n_steps
+        state["energy_squares"][t_index] = E2_total / n_steps
+        estimates = accumulator.estimates()
+        state["estimates"][t_index] = [estimates[key] for key in ESTIMATE_KEYS]
+
+        t_index, step = t_index + 1, 0
+        if t_index < len(T_range):
+            rng, lattice, E, M, E_total, E2_total, M_total, accumulator = start_temperature(t_index)
+        checkpoint()
+
+    errors = {T: dict(zip(ESTIMATE_KEYS, row)) for T, row in zip(T_range, state["estimates"])}
+    return (state["magnetizations"], state["energies"], state["energy_squares"],
+            archive.as_configs(), errors)
+
+def run_sweep(T_range, L=ising.L, method="metropolis", eq_steps=ising.eq_steps, n_steps=ising.n_steps,
+              checkpoint_path=checkpoint_file, snapshot_path=snapshot_file, checkpoint_every=checkpoint_every,
+              seed=ising.seed):
+    """
+    Checkpointed simulate_ising. If checkpoint_path holds an unfinished sweep
+    with the same parameters, it is resumed, so running the same call again
+    after a crash carries on where the last checkpoint left off (seed=None
+    adopts the checkpoint's seed). A finished sweep in checkpoint_path is
+    replaced by a new one; an unfinished sweep with other parameters raises
+    ValueError instead of being overwritten.
+    """
+    state = new_sweep_state(T_range, L, method, eq_steps, n_steps, snapshot_path, seed)
+    if os.path.exists(checkpoint_path):
+        stored = load_checkpoint(checkpoint_path)
+        if int(stored["t_index"]) < len(stored["T_range"]):
+            different = sweep_differences(stored, state, compare_seed=seed is not None)
+            if different:
+                raise ValueError(f"{checkpoint_path} holds an unfinished sweep with different "
+                                 f"{', '.join(different)}; resume() it or use another checkpoint_path")
+            return continue_sweep(stored, checkpoint_path, checkpoint_every)
+    return continue_sweep(state, checkpoint_path, checkpoint_every)
+
+# Parameters in which a stored sweep state differs from a new one
+def sweep_differences(stored, state, compare_seed=True):
+    keys = ["L", "method", "eq_steps", "n_steps", "snapshot_path"] + (["seed"] if compare_seed else [])
+    different = [key for key in keys if str(stored[key]) != str(state[key])]
+    if stored["T_range"].shape != state["T_range"].shape or not np.allclose(stored["T_range"], state["T_range"]):
+        different.insert(0, "T_range")
+    return different
+
+# Resume entry point
+def resume(checkpoint_path=checkpoint_file, checkpoint_every=checkpoint_every):
+    return continue_sweep(load_checkpoint(checkpoint_path), checkpoint_path, checkpoint_every)
+
+# Main execution
+if __name__ == "__main__":
+    temperatures = np.linspace(ising.T_min, ising.T_max, ising.n_temp)
+    magnetizations, energies, energy_squares, configs, errors = run_sweep(temperatures, method=ising.update_method,
+                                                                          seed=ising.seed)
+
+    print("    T      |M|/N       C_v     C_v err")
+    for T, m in zip(temperatures, magnetizations):
+        print(f"{T:7.3f}  {m:8.4f}  {errors[T]['C_v']:8.4f}  {errors[T]['C_v_err']:8.4f}")
@@ -0,0 +1,181 @@
+import importlib
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+from scipy.optimize import minimize
+
+from random_streams import make_generator, resolve_seed
+
+# 2d_ising.py is not a valid identifier, so it has to be imported by name
+ising = importlib.import_module("2d_ising")
+
+# Constants
+L_values = [8, 16, 32, 64]     # Lattice sizes of the scaling study
+T_min, T_max = 2.0, 2.6        # Temperature window around Tc
+n_temp = 16                    # Number of temperature points per L
+eq_sweeps = 1000               # Equilibration sweeps per job
+n_sweeps = 5000                # Measurement sweeps per job
+collapse_degree = 4            # Polynomial degree of the master curve in a collapse fit
+collapse_window = 2.0          # Only |T - Tc| L^(1/nu) below this enters a collapse fit
+
+# Monte Carlo steps that make up one sweep for an update method
+def steps_per_sweep(method, L):
+    # metropolis_step flips one spin; the other methods touch the whole lattice per step
+    return L * L if method == "metropolis" else 1
+
+# One (L, T) point of the job matrix (runs inside a pool worker)
+def run_job(job):
+    """
+    job: (L, T, method, eq_sweeps, n_sweeps, seed, key)
+
+    The job draws from the stream (seed, key), key = (L index, T index), so
+    its result does not depend on which worker runs it.
+
+    Returns: (L, T, moments) with moments = [<E>, <E^2>, <|M|>, <M^2>, <M^4>]
+             of the total energy and magnetization, measured once per sweep
+    """
+    L, T, method, eq_sweeps, n_sweeps, seed, key = job
+    rng = make_generator(seed, key)
+    step_fn = ising.UPDATE_METHODS[method]
+    sweep = steps_per_sweep(method, L)
+
+    lattice = ising.initialize_lattice(L, rng)
+    E = ising.calculate_total_energy(lattice)
+    M = ising.calculate_magnetization(lattice)
+
+    for _ in range(eq_sweeps * sweep):
+        E, M = step_fn(lattice, E, M, T, rng)
+
+    moments = np.zeros(5)
+    for _ in range(n_sweeps):
+        for _ in range(sweep):
+            E, M = step_fn(lattice, E, M, T, rng)
+        M2 = float(M) * M
+        moments += (E, E * E, abs(M), M2, M2 * M2)
+
+    return L, T, moments / n_sweeps
+
+# Every (L, T) job, largest (longest) lattices first so they do not finish last
+def build_jobs(L_values, temperatures, method, eq_sweeps, n_sweeps, seed):
+    jobs = [(L, T, method, eq_sweeps, n_sweeps, seed, (a, b))
+            for a, L in enumerate(L_values) for b, T in enumerate(temperatures)]
+    # cost of a job ~ spins x sweeps
+    return sorted(jobs, key=lambda job: job[0] ** 2 * (job[3] + job[4]), reverse=True)
+
+def run_scaling_study(L_values=L_values, temperatures=None, method="checkerboard",
+                      eq_sweeps=eq_sweeps, n_sweeps=n_sweeps, processes=None, seed=ising.seed):
+    """
+    Runs the L x T job matrix in a process pool.
+
+    Returns: {L: {"T", "E", "C_v", "absM", "chi", "U4"}} with per-spin E, |M|,
+             C_v, chi and the Binder cumulant U4 = 1 - <M^4> / (3 <M^2>^2),
+             each an array over temperatures
+    """
+    if temperatures is None:
+        temperatures = np.linspace(T_min, T_max, n_temp)
+    temperatures = np.asarray(temperatures, dtype=float)
+    jobs = build_jobs(L_values, temperatures, method, eq_sweeps, n_sweeps, resolve_seed(seed))
+
+    moments = {}
+    with Pool(processes or cpu_count()) as pool:
+        for L, T, values in pool.imap_unordered(run_job, jobs):
+            moments[L, T] = values
+
+    results = {}
+    for L in L_values:
+        E, E2, absM, M2, M4 = np.array([moments[L, T] for T in temperatures]).T
+        N = L * L
+        results[L] = {
+            "T": temperatures,
+            "E": E / N,
+            "C_v": (E2 - E**2) / (ising.kB * temperatures**2 * N),
+            "absM": absM / N,
+            "chi": (M2 - absM**2) / (ising.kB * temperatures * N),
+            "U4": 1.0 - M4 / (3.0 * M2**2),
+        }
+    return results
+
+# ----------------------- Analysis ---------------------------------------------
+# Location and height of a maximum, refined by a parabola through the top three points
+def peak(T, y):
+    k = int(np.clip(np.argmax(y), 1, len(y) - 2))
+    a, b, c = np.polyfit(T[k - 1:k + 2], y[k - 1:k + 2], 2)
+    if a >= 0:  # not a maximum, keep the raw grid point
+        k = int(np.argmax(y))
+        return T[k], y[k]
+    T_peak = -b / (2 * a)
+    return T_peak, np.polyval([a, b, c], T_peak)
+
+# Temperatures where the Binder cumulants of successive sizes cross
+def binder_crossings(results):
+    L_sorted = sorted(results)
+    crossings = []
+    for L1, L2 in zip(L_sorted, L_sorted[1:]):
+        T = results[L1]["T"]
+        diff = results[L1]["U4"] - results[L2]["U4"]
+        sign_change = np.flatnonzero(np.diff(np.sign(diff)) != 0)
+        if sign_change.size:
+            k = sign_change[0]
+            # linear interpolation of the zero of U4(L1) - U4(L2)
+            crossings.append(T[k] - diff[k] * (T[k + 1] - T[k]) / (diff[k + 1] - diff[k]))
+    return np.array(crossings)
+
+# Quality of a scaling collapse: scatter around one polynomial master curve
+def collapse_cost(params, results, key, fixed_exponent=None):
+    if fixed_exponent is None:
+        Tc, nu, exponent = params
+    else:
+        (Tc, nu), exponent = params, fixed_exponent
+    if nu <= 0:
+        return np.inf
+
+    x, y = [], []
+    for L, data in results.items():
+        x.append((data["T"] - Tc) * L ** (1.0 / nu))
+        y.append(data[key] * L ** (-exponent))
+    x, y = np.concatenate(x), np.concatenate(y)
+
+    inside = np.abs(x) < collapse_window
+    if np.count_nonzero(inside) <= collapse_degree + 2:
+        return np.inf
+    coeffs = np.polyfit(x[inside], y[inside], collapse_degree)
+    residual = y[inside] - np.polyval(coeffs, x[inside])
+    return np.mean(residual**2) / np.var(y[inside])
+
+def fit_collapse(results, key, Tc_guess, nu_guess=1.0, exponent_guess=None):
+    """
+    Fits Tc, nu (and the exponent a in Y ~ L^a f((T - Tc) L^(1/nu)) unless
+    exponent_guess is None, which fixes a = 0, as for the Binder cumulant)
+    by minimizing collapse_cost with Nelder-Mead.
+
+    Returns: dict with Tc, nu, exponent and the final cost
+    """
+    if exponent_guess is None:
+        fit = minimize(collapse_cost, [Tc_guess, nu_guess], args=(results, key, 0.0), method="Nelder-Mead")
+        Tc, nu = fit.x
+        exponent = 0.0
+    else:
+        fit = minimize(collapse_cost, [Tc_guess, nu_guess, exponent_guess], args=(results, key),
+                       method="Nelder-Mead")
+        Tc, nu, exponent = fit.x
+    return {"Tc": Tc, "nu": nu, "exponent": exponent, "cost": fit.fun}
+
+# Main execution
+if __name__ == "__main__":
+    results = run_scaling_study()
+
+    print("   L    T(chi max)   chi max    T(C_v max)   C_v max")
+    for L, data in sorted(results.items()):
+        T_chi, chi_max = peak(data["T"], data["chi"])
+        T_cv, cv_max = peak(data["T"], data["C_v"])
+        print(f"{L:4d}   {T_chi:9.4f}  {chi_max:9.4f}   {T_cv:9.4f}  {cv_max:9.4f}")
+
+    crossings = binder_crossings(results)
+    Tc_guess = np.mean(crossings) if crossings.size else 2.269
+    print(f"\nBinder cumulant crossings: {np.round(crossings, 4)}")
+
+    binder_fit = fit_collapse(results, "U4", Tc_guess)
+    chi_fit = fit_collapse(results, "chi", binder_fit["Tc"], binder_fit["nu"], exponent_guess=1.75)
+    print(f"U4 collapse:  Tc = {binder_fit['Tc']:.4f}, nu = {binder_fit['nu']:.3f}  (exact 2.2692, 1)")
+    print(f"chi collapse: Tc = {chi_fit['Tc']:.4f}, nu = {chi_fit['nu']:.3f}, "
+          f"gamma/nu = {chi_fit['exponent']:.3f}  (exact 1.75)")
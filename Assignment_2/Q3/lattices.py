@@ -0,0 +1,185 @@
+import importlib
+
+import numpy as np
+
+from random_streams import resolve_seed, spawn_generators
+
+# 2d_ising.py is not a valid identifier, so it has to be imported by name
+ising = importlib.import_module("2d_ising")
+
+# Lattice-agnostic Ising / q-state Potts engine. Every lattice is reduced to a
+# flat neighbour-index table (n_sites, z) plus a colouring of the sites into
+# groups with no bonds inside a group, so the vectorized checkerboard idea of
+# 2d_ising.py works on any lattice: all sites of one colour update at once.
+
+# ----------------------- Lattices ---------------------------------------------
+class Lattice:
+    """
+    neighbors: (n_sites, z) flat indices of the z neighbours of every site
+    colors: list of site-index arrays; no two sites of one array are neighbours
+    shape: spatial shape used to reshape flat spin arrays for plotting
+    """
+
+    def __init__(self, neighbors, colors=None, shape=None, name="custom"):
+        self.neighbors = np.asarray(neighbors)
+        self.n_sites, self.coordination = self.neighbors.shape
+        self.colors = colors if colors is not None else greedy_coloring(self.neighbors)
+        self.shape = shape or (self.n_sites,)
+        self.name = name
+
+    def __repr__(self):
+        return f"Lattice({self.name}, shape={self.shape}, z={self.coordination})"
+
+# Neighbour table of a periodic box for a list of integer displacement vectors
+def periodic_neighbor_table(shape, offsets):
+    site = np.arange(int(np.prod(shape))).reshape(shape)
+    axes = tuple(range(len(shape)))
+    # np.roll by -d puts the index of site x + d at position x
+    return np.stack([np.roll(site, tuple(-np.asarray(d)), axis=axes).ravel() for d in offsets], axis=1)
+
+# Sites grouped by colour = (coefficients . position) mod n_colors
+def modular_coloring(shape, coefficients, n_colors):
+    position = np.indices(shape).reshape(len(shape), -1)
+    color = np.tensordot(coefficients, position, axes=1) % n_colors
+    return [np.flatnonzero(color == c) for c in range(n_colors)]
+
+# Colouring for arbitrary neighbour tables (first colour not used by a neighbour)
+def greedy_coloring(neighbors):
+    color = np.full(len(neighbors), -1)
+    for site, nbs in enumerate(neighbors):
+        taken = set(color[nbs].tolist())
+        color[site] = next(c for c in range(len(nbs) + 1) if c not in taken)
+    return [np.flatnonzero(color == c) for c in range(color.max() + 1)]
+
+def square_lattice(L):
+    if L % 2:
+        raise ValueError(f"the square lattice needs an even L for its 2-colouring, got L = {L}")
+    # Same neighbour order as neighbor_table in 2d_ising.py
+    return Lattice(ising.neighbor_table(L), modular_coloring((L, L), (1, 1), 2), (L, L), "square")
+
+def triangular_lattice(L):
+    if L % 3:
+        raise ValueError(f"the triangular lattice needs L divisible by 3 for its 3-colouring, got L = {L}")
+    offsets = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, -1), (-1, 1)]
+    return Lattice(periodic_neighbor_table((L, L), offsets), modular_coloring((L, L), (1, 2), 3),
+                   (L, L), "triangular")
+
+def simple_cubic_lattice(L):
+    if L % 2:
+        raise ValueError(f"the simple cubic lattice needs an even L for its 2-colouring, got L = {L}")
+    offsets = [(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1)]
+    return Lattice(periodic_neighbor_table((L, L, L), offsets), modular_coloring((L, L, L), (1, 1, 1), 2),
+                   (L, L, L), "simple cubic")
+
+LATTICES = {
+    "square": square_lattice,
+    "triangular": triangular_lattice,
+    "cubic": simple_cubic_lattice,
+}
+
+# ----------------------- Spin Models ------------------------------------------
+class IsingSpins:
+    """s = +1 / -1, E = -J sum_<ij> s_i s_j"""
+
+    def __init__(self, J=ising.J):
+        self.J = J
+
+    def random_spins(self, n_sites, rng):
+        return rng.choice(np.array([1, -1], dtype=np.int8), size=n_sites)
+
+    def bond_energy(self, spins, neighbor_spins):
+        return -self.J * spins[:, None] * neighbor_spins
+
+    def propose(self, spins, rng):
+        return -spins
+
+    # |m| per spin
+    def order_parameter(self, spins):
+        return abs(np.sum(spins, dtype=np.int64)) / spins.size
+
+class PottsSpins:
+    """s = 0 .. q-1, E = -J sum_<ij> delta(s_i, s_j)"""
+
+    def __init__(self, q, J=ising.J):
+        self.q = q
+        self.J = J
+
+    def random_spins(self, n_sites, rng):
+        return rng.integers(0, self.q, size=n_sites).astype(np.int8)
+
+    def bond_energy(self, spins, neighbor_spins):
+        return -self.J * (spins[:, None] == neighbor_spins)
+
+    # A uniformly random state different from the current one
+    def propose(self, spins, rng):
+        return ((spins + rng.integers(1, self.q, size=spins.size)) % self.q).astype(spins.dtype)
+
+    # (q * largest fraction - 1) / (q - 1): 0 when disordered, 1 when fully ordered
+    def order_parameter(self, spins):
+        fraction = np.bincount(spins, minlength=self.q).max() / spins.size
+        return (self.q * fraction - 1.0) / (self.q - 1.0)
+
+# ----------------------- Kernels ----------------------------------------------
+def total_energy(lattice, spins, model):
+    # every bond appears twice in the neighbour table
+    return float(np.sum(model.bond_energy(spins, spins[lattice.neighbors])) / 2.0)
+
+# Colour-by-colour Metropolis sweep that updates E locally
+def colored_sweep(lattice, spins, E, T, model, rng=None):
+    """
+    Offers every site a move to model.propose(...) once, one colour group at a
+    time. Sites of one colour share no bond, so their energy changes are
+    independent and all of them are accepted or rejected in one array step.
+
+    Returns: updated E
+    """
+    rng = rng or ising.default_rng
+    for sites in lattice.colors:
+        old = spins[sites]
+        new = model.propose(old, rng)
+        neighbor_spins = spins[lattice.neighbors[sites]]
+        dE = np.sum(model.bond_energy(new, neighbor_spins) - model.bond_energy(old, neighbor_spins), axis=1)
+
+        accept = (dE <= 0) | (rng.random(sites.size) < np.exp(-np.maximum(dE, 0) / (ising.kB * T)))
+        spins[sites[accept]] = new[accept]
+        E += float(np.sum(dE[accept]))
+    return E
+
+def simulate_lattice(T_range, lattice, model, eq_sweeps=1000, n_sweeps=5000, seed=ising.seed):
+    """
+    simulate_ising for any Lattice / spin model (one colored_sweep per step).
+
+    Returns: (order_parameters, energies, energy_squares, configs) with the
+             per-spin order parameter in place of |M| / L^2 and configs
+             reshaped to lattice.shape
+    """
+    order_parameters = []
+    energies = []
+    energy_squares = []
+    configs = {}
+
+    for T, rng in zip(T_range, spawn_generators(resolve_seed(seed), len(T_range))):
+        spins = model.random_spins(lattice.n_sites, rng)
+        E = total_energy(lattice, spins, model)
+
+        for _ in range(eq_sweeps):
+            E = colored_sweep(lattice, spins, E, T, model, rng)
+
+        E_total = 0.0
+        E2_total = 0.0
+        m_total = 0.0
+
+        for step in range(n_sweeps):
+            E = colored_sweep(lattice, spins, E, T, model, rng)
+            E_total += E
+            E2_total += E * E
+            m_total += model.order_parameter(spins)
+
+            if step == n_sweeps // 2:
+                configs[T] = spins.reshape(lattice.shape).copy()
+
+        order_parameters.append(m_total / n_sweeps)
+        energies.append(E_total / n_sweeps)
+        energy_squares.append(E2_total / n_sweeps)
+
+    return np.array(order_parameters), np.array(energies), np.array(energy_squares), configs
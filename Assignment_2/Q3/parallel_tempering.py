@@ -0,0 +1,126 @@
+import importlib
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+
+from random_streams import make_generator, resolve_seed, spawn_generators
+
+# 2d_ising.py is not a valid identifier, so it has to be imported by name
+ising = importlib.import_module("2d_ising")
+
+# Constants
+exchange_every = 10  # Monte Carlo steps each replica makes between swap attempts
+
+# Advance one replica at a fixed temperature (runs inside a pool worker)
+def advance_replica(args):
+    """
+    args: (lattice, E, M, T, n_steps, method, measure, rng)
+
+    Returns: (lattice, E, M, E_sum, E2_sum, absM_sum, rng) where the sums cover
+             the n_steps just made (all zero when measure is False) and rng is
+             the advanced generator, handed back so the stream continues in
+             whichever worker gets the next round
+    """
+    lattice, E, M, T, n_steps, method, measure, rng = args
+    step_fn = ising.UPDATE_METHODS[method]
+
+    E_sum = E2_sum = absM_sum = 0.0
+    for _ in range(n_steps):
+        E, M = step_fn(lattice, E, M, T, rng)
+        if measure:
+            E_sum += E
+            E2_sum += E * E
+            absM_sum += abs(M)
+
+    return lattice, E, M, E_sum, E2_sum, absM_sum, rng
+
+# Replica-exchange attempts between neighbouring temperatures
+def exchange_replicas(T_range, lattices, E, M, offset, rng):
+    """
+    Tries to swap the configurations at T[i] and T[i+1] for every pair starting
+    at index offset (0 or 1, alternated between rounds) with the standard
+    acceptance probability min(1, exp[(1/kT_i - 1/kT_{i+1}) (E_i - E_{i+1})]).
+
+    Returns: number of accepted swaps
+    """
+    accepted = 0
+    for i in range(offset, len(T_range) - 1, 2):
+        delta = ((1.0 / (ising.kB * T_range[i]) - 1.0 / (ising.kB * T_range[i + 1]))
+                 * (E[i] - E[i + 1]))
+        if delta >= 0 or rng.random() < np.exp(delta):
+            lattices[i], lattices[i + 1] = lattices[i + 1], lattices[i]
+            E[i], E[i + 1] = E[i + 1], E[i]
+            M[i], M[i + 1] = M[i + 1], M[i]
+            accepted += 1
+    return accepted
+
+def parallel_tempering(T_range, L=ising.L, method="checkerboard", eq_steps=ising.eq_steps,
+                       n_steps=ising.n_steps, exchange_every=exchange_every, processes=None, seed=ising.seed):
+    """
+    Replica-exchange version of simulate_ising: one replica per temperature,
+    every replica advanced in its own pool worker, with neighbour swaps after
+    every exchange_every steps (during equilibration as well as measurement).
+
+    Each temperature slot owns one random stream and the swaps use another,
+    so a given seed gives the same result for any number of processes.
+
+    Returns the same (magnetizations, energies, energy_squares, configs) as
+    simulate_ising, plus the swap acceptance rate.
+    """
+    T_range = np.asarray(T_range, dtype=float)
+    n_replicas = len(T_range)
+    seed = resolve_seed(seed)
+    streams = spawn_generators(seed, n_replicas)
+    exchange_rng = make_generator(seed, (n_replicas,))
+    lattices = [ising.initialize_lattice(L, rng) for rng in streams]
+    E = [ising.calculate_total_energy(lattice) for lattice in lattices]
+    M = [ising.calculate_magnetization(lattice) for lattice in lattices]
+
+    E_total = np.zeros(n_replicas)
+    E2_total = np.zeros(n_replicas)
+    M_total = np.zeros(n_replicas)
+    configs = {}
+
+    n_eq_rounds = -(-eq_steps // exchange_every)
+    n_rounds = -(-n_steps // exchange_every)
+    swaps_accepted = swaps_tried = 0
+
+    with Pool(processes or min(n_replicas, cpu_count())) as pool:
+        for rnd in range(n_eq_rounds + n_rounds):
+            measure = rnd >= n_eq_rounds
+            tasks = [(lattices[k], E[k], M[k], T_range[k], exchange_every, method, measure, streams[k])
+                     for k in range(n_replicas)]
+
+            for k, (lattice, E_k, M_k, E_sum, E2_sum, absM_sum, rng) in enumerate(pool.map(advance_replica, tasks)):
+                lattices[k], E[k], M[k], streams[k] = lattice, E_k, M_k, rng
+                E_total[k] += E_sum
+                E2_total[k] += E2_sum
+                M_total[k] += absM_sum
+
+            # Store a configuration snapshot at midpoint of the measurement
+            if rnd == n_eq_rounds + n_rounds // 2:
+                configs = {T: lattice.copy() for T, lattice in zip(T_range, lattices)}
+
+            swaps_accepted += exchange_replicas(T_range, lattices, E, M, rnd % 2, exchange_rng)
+            swaps_tried += (n_replicas - rnd % 2) // 2
+
+    n_measured = n_rounds * exchange_every
+    magnetizations = M_total / n_measured / (L * L)
+    energies = E_total / n_measured
+    energy_squares = E2_total / n_measured
+    acceptance = swaps_accepted / max(swaps_tried, 1)
+
+    return magnetizations, energies, energy_squares, configs, acceptance
+
+# Main execution
+if __name__ == "__main__":
+    temperatures = np.linspace(ising.T_min, ising.T_max, ising.n_temp)
+    magnetizations, energies, energy_squares, configs, acceptance = parallel_tempering(temperatures)
+
+    # Compute specific heat, normalized by L^2
+    specific_heat = (energy_squares - energies**2) / (ising.kB * temperatures**2 * (ising.L**2))
+
+    print(f"Replica swap acceptance: {acceptance:.3f}")
+    print("    T      |M|/N      C_v")
+    for T, m, c in zip(temperatures, magnetizations, specific_heat):
+        print(f"{T:7.3f}  {m:8.4f}  {c:8.4f}")
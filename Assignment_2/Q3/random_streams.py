@@ -0,0 +1,40 @@
+import json
+
+import numpy as np
+
+# Random-number streams for the Ising code, built on numpy.random.Generator.
+#
+# Every replica / temperature / worker job gets its own counter-based Philox
+# stream, derived from one base seed and a spawn key that names the job (e.g.
+# the temperature index). A job therefore draws the same numbers whichever
+# worker runs it and however many workers there are.
+
+def make_generator(seed=None, key=()):
+    """
+    Philox generator for base seed `seed` and spawn key `key` (a tuple of
+    ints). seed=None draws fresh OS entropy, which is not reproducible.
+    """
+    return np.random.Generator(np.random.Philox(np.random.SeedSequence(seed, spawn_key=tuple(key))))
+
+# Fixed base seed for a run: seed itself, or fresh OS entropy shared by all its streams
+def resolve_seed(seed=None):
+    return np.random.SeedSequence(seed).entropy
+
+# n independent generators, one per replica / temperature
+def spawn_generators(seed, n):
+    return [make_generator(seed, (k,)) for k in range(n)]
+
+# One extra base seed from a generator, e.g. to hand a sub-task its own seed family
+def child_seed(rng):
+    return int(rng.integers(0, 2**63))
+
+# Generator state as a JSON string (storable in an .npz checkpoint) and back
+def generator_state(rng):
+    state = rng.bit_generator.state
+    return json.dumps(state, default=lambda a: a.tolist())
+
+def restore_generator(state_json):
+    state = json.loads(state_json)
+    bit_generator = getattr(np.random, state["bit_generator"])()
+    bit_generator.state = state
+    return np.random.Generator(bit_generator)
@@ -0,0 +1,79 @@
+from multiprocessing import Pool, cpu_count
+
+import matplotlib
+matplotlib.use("Agg")  # the compute nodes have no display: figures only go to files
+import matplotlib.pyplot as plt
+import numpy as np
+
+# Constants
+max_side = 1024  # Snapshots with more sites per side than this are block-averaged
+dpi = 150        # Resolution of the saved figures
+
+# ----------------------- Downsampling -----------------------------------------
+# Mean spin of b x b blocks, with b chosen so at most max_side blocks fit per side
+def block_average(config, max_side=max_side):
+    """
+    config: 2D array of spins
+
+    Returns: float32 array of block means in [-1, 1] (config itself, as float32,
+             when it is already small enough). Edge blocks that do not fill a
+             whole b x b block are averaged over the sites they do have.
+    """
+    config = np.asarray(config, dtype=np.float32)
+    b = int(np.ceil(max(config.shape) / max_side))
+    if b <= 1:
+        return config
+
+    starts = [np.arange(0, n, b) for n in config.shape]
+    sums = np.add.reduceat(np.add.reduceat(config, starts[0], axis=0), starts[1], axis=1)
+    sizes = [np.diff(np.append(s, n)) for s, n in zip(starts, config.shape)]
+    return sums / np.outer(*sizes).astype(np.float32)
+
+# ----------------------- Figures ----------------------------------------------
+def render_curve(path, x, y, style, xlabel, ylabel, title):
+    fig, ax = plt.subplots(figsize=(6, 5))
+    ax.plot(x, y, style)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.grid(True)
+    fig.savefig(path, dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+
+def render_snapshot(path, image, T):
+    fig, ax = plt.subplots(figsize=(4, 4))
+    # Block means are shades of grey; a full-resolution lattice stays black and white
+    ax.imshow(image, cmap='gray', vmin=-1, vmax=1, interpolation='none')
+    ax.set_title(f'Spins at T = {T:.3f}')
+    ax.axis('off')
+    fig.savefig(path, dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+
+RENDERERS = {
+    "curve": render_curve,
+    "snapshot": render_snapshot,
+}
+
+# Jobs are (kind, args) with args passed on to RENDERERS[kind]; args[0] is the output path
+def curve_job(path, x, y, style, xlabel, ylabel, title):
+    return "curve", (path, np.asarray(x), np.asarray(y), style, xlabel, ylabel, title)
+
+# Downsampled here, before the job is pickled, so large lattices never reach a worker
+def snapshot_job(path, config, T, max_side=max_side):
+    return "snapshot", (path, block_average(config, max_side), T)
+
+def render_job(job):
+    kind, args = job
+    RENDERERS[kind](*args)
+    return args[0]
+
+def render_figures(jobs, processes=None):
+    """
+    Renders independent figures side by side in a process pool.
+
+    Returns: list of the written file paths, in job order
+    """
+    if not jobs:
+        return []
+    with Pool(processes or min(len(jobs), cpu_count())) as pool:
+        return pool.map(render_job, jobs)
@@ -0,0 +1,103 @@
+import importlib
+
+import numpy as np
+from scipy.special import logsumexp
+
+# 2d_ising.py is not a valid identifier, so it has to be imported by name
+ising = importlib.import_module("2d_ising")
+
+# Constants
+tolerance = 1e-10   # Convergence threshold on the free energies f_k
+max_iter = 100000   # Upper bound on self-consistency iterations
+n_fine = 400        # Number of points on the reweighted temperature grid
+
+# Combine the per-temperature histograms from simulate_ising on one energy axis
+def stack_histograms(histograms):
+    """
+    histograms: {T: {"E": levels, "counts": counts, "absM": |M| sums}}
+
+    Returns: (betas, E_levels, counts, absM_sums) where counts has shape
+             (n_runs, n_levels) and absM_sums is pooled over all runs
+    """
+    temperatures = np.array(sorted(histograms))
+    E_levels = np.unique(np.concatenate([histograms[T]["E"] for T in temperatures]))
+
+    counts = np.zeros((len(temperatures), len(E_levels)))
+    absM_sums = np.zeros(len(E_levels))
+    for k, T in enumerate(temperatures):
+        idx = np.searchsorted(E_levels, histograms[T]["E"])
+        counts[k, idx] = histograms[T]["counts"]
+        absM_sums[idx] += histograms[T]["absM"]
+
+    return 1.0 / (ising.kB * temperatures), E_levels, counts, absM_sums
+
+# Ferrenberg-Swendsen self-consistency for the density of states
+def solve_density_of_states(betas, E_levels, counts, tolerance=tolerance, max_iter=max_iter):
+    """
+    Iterates
+        ln g(E) = ln H(E) - ln sum_k n_k exp(-beta_k E + f_k)
+        f_k     = -ln sum_E g(E) exp(-beta_k E)
+    entirely in log space until the f_k stop changing.
+
+    Returns: ln g(E) on E_levels, fixed up to an additive constant (ln g = -inf
+             for levels no run visited)
+    """
+    log_n = np.log(counts.sum(axis=1))
+    with np.errstate(divide="ignore"):
+        log_H = np.log(counts.sum(axis=0))
+    minus_beta_E = -np.outer(betas, E_levels)  # shape (n_runs, n_levels)
+
+    f = np.zeros(len(betas))
+    for _ in range(max_iter):
+        log_g = log_H - logsumexp(log_n[:, None] + minus_beta_E + f[:, None], axis=0)
+        f_new = -logsumexp(log_g[None, :] + minus_beta_E, axis=1)
+        f_new -= f_new[0]  # g(E) is only defined up to a constant
+        if np.max(np.abs(f_new - f)) < tolerance:
+            break
+        f = f_new
+    else:
+        raise RuntimeError(f"multi-histogram iteration did not converge in {max_iter} steps")
+
+    return log_g
+
+# Canonical averages at arbitrary temperatures from ln g(E)
+def reweight(T_fine, log_g, E_levels, absM_per_level, L=ising.L):
+    """
+    T_fine: temperatures to evaluate at
+    absM_per_level: microcanonical average of |M| at each energy level
+
+    Returns: (magnetizations, energies, specific_heat) per spin conventions of
+             2d_ising.py (|M| and C_v normalized by L^2, E total)
+    """
+    T_fine = np.asarray(T_fine, dtype=float)
+    log_w = log_g[None, :] - np.outer(1.0 / (ising.kB * T_fine), E_levels)
+    weights = np.exp(log_w - logsumexp(log_w, axis=1)[:, None])
+
+    energies = weights @ E_levels
+    energy_squares = weights @ E_levels**2
+    magnetizations = weights @ absM_per_level / (L * L)
+    specific_heat = (energy_squares - energies**2) / (ising.kB * T_fine**2 * (L**2))
+
+    return magnetizations, energies, specific_heat
+
+def multi_histogram(histograms, T_fine, L=ising.L):
+    """
+    Full pipeline: histograms from simulate_ising(..., record_histograms=True)
+    to (magnetizations, energies, specific_heat) on the grid T_fine.
+    """
+    betas, E_levels, counts, absM_sums = stack_histograms(histograms)
+    log_g = solve_density_of_states(betas, E_levels, counts)
+    absM_per_level = absM_sums / np.maximum(counts.sum(axis=0), 1)
+    return reweight(T_fine, log_g, E_levels, absM_per_level, L=L)
+
+# Main execution
+if __name__ == "__main__":
+    temperatures = np.linspace(ising.T_min, ising.T_max, ising.n_temp)
+    *_, histograms = ising.simulate_ising(temperatures, method=ising.update_method,
+                                          record_histograms=True)
+
+    T_fine = np.linspace(ising.T_min, ising.T_max, n_fine)
+    magnetizations, energies, specific_heat = multi_histogram(histograms, T_fine)
+
+    peak = np.argmax(specific_heat)
+    print(f"Reweighted C_v peak: {specific_heat[peak]:.4f} at T = {T_fine[peak]:.4f}")
@@ -0,0 +1,181 @@
+import importlib
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+from scipy.special import logsumexp
+
+from random_streams import make_generator, resolve_seed
+from reweighting import reweight
+
+# 2d_ising.py is not a valid identifier, so it has to be imported by name
+ising = importlib.import_module("2d_ising")
+
+# Constants
+L = 16                 # Lattice size of the density-of-states run
+ln_f_final = 1e-6      # Stop once the modification factor ln f drops below this
+flatness = 0.8         # Histogram is flat when min(H) > flatness * mean(H)
+check_every = 10000    # Spin-flip attempts between flatness checks
+n_windows = 4          # Energy windows run side by side in separate processes
+window_overlap = 0.25  # Fraction of a window shared with its neighbour
+
+# ----------------------- Energy Binning ---------------------------------------
+# Energies of the square lattice are -2N|J| + 4|J| k, k = 0..N: one bin per level
+def level_energies(L):
+    return -2.0 * abs(ising.J) * L * L + 4.0 * abs(ising.J) * np.arange(L * L + 1)
+
+def energy_bin(E, L):
+    return np.rint((np.asarray(E) + 2.0 * abs(ising.J) * L * L) / (4.0 * abs(ising.J))).astype(int)
+
+# Split the level index range 0..N into overlapping windows
+def energy_windows(L, n_windows=n_windows, overlap=window_overlap):
+    n_levels = L * L + 1
+    width = n_levels / (n_windows - (n_windows - 1) * overlap)
+    starts = np.arange(n_windows) * width * (1 - overlap)
+    return [(int(s), min(int(np.ceil(s + width)), n_levels - 1)) for s in starts]
+
+# ----------------------- Random Walk ------------------------------------------
+# Single-spin moves that only ever bring E closer to the window [lo, hi] (levels)
+def walk_into_window(lattice, E, M, lo, hi, rng):
+    L = len(lattice)
+    target = 0.5 * (lo + hi)
+    while not lo <= energy_bin(E, L) <= hi:
+        i, j = rng.integers(0, L, 2)
+        dE = ising.delta_energy(lattice, i, j)
+        if abs(energy_bin(E + dE, L) - target) <= abs(energy_bin(E, L) - target):
+            M += -2 * lattice[i, j]
+            lattice[i, j] *= -1
+            E += dE
+    return E, M
+
+def wang_landau_window(args):
+    """
+    Wang-Landau random walk restricted to the energy levels lo..hi.
+
+    args: (L, lo, hi, ln_f_final, seed, window_index); the walk draws from
+          the stream (seed, window_index)
+
+    Returns: (ln_g, visited, counts, absM_sums) over all N + 1 levels, where
+             ln_g is only meaningful (up to a constant) where visited is True
+             and counts/absM_sums give the microcanonical average of |M|
+    """
+    L, lo, hi, ln_f_final, seed, window_index = args
+    rng = make_generator(seed, (window_index,))
+    n_levels = L * L + 1
+
+    lattice = ising.initialize_lattice(L, rng)
+    E = ising.calculate_total_energy(lattice)
+    M = ising.calculate_magnetization(lattice)
+    E, M = walk_into_window(lattice, E, M, lo, hi, rng)
+
+    ln_g = np.zeros(n_levels)
+    H = np.zeros(n_levels)
+    visited = np.zeros(n_levels, dtype=bool)
+    counts = np.zeros(n_levels)
+    absM_sums = np.zeros(n_levels)
+    ln_f = 1.0
+
+    b = int(energy_bin(E, L))
+    while ln_f > ln_f_final:
+        # Random numbers for a whole block are drawn at once
+        sites = rng.integers(0, L, size=(check_every, 2))
+        uniforms = rng.random(check_every)
+        bins = np.empty(check_every, dtype=int)
+        abs_M = np.empty(check_every)
+
+        for step in range(check_every):
+            i, j = sites[step]
+            dE = ising.delta_energy(lattice, i, j)
+            b_new = b + int(round(dE / (4.0 * abs(ising.J))))
+
+            # Accept with min(1, g(E_old) / g(E_new)), never leaving the window
+            if lo <= b_new <= hi and (ln_g[b_new] <= ln_g[b] or
+                                      uniforms[step] < np.exp(ln_g[b] - ln_g[b_new])):
+                M += -2 * lattice[i, j]
+                lattice[i, j] *= -1
+                b = b_new
+
+            ln_g[b] += ln_f
+            bins[step] = b
+            abs_M[step] = abs(M)
+
+        # Histogram bookkeeping for the whole block in one go
+        block_counts = np.bincount(bins, minlength=n_levels)
+        H += block_counts
+        counts += block_counts
+        absM_sums += np.bincount(bins, weights=abs_M, minlength=n_levels)
+        visited |= block_counts > 0
+
+        h = H[visited]
+        if h.min() > flatness * h.mean():
+            ln_f /= 2.0
+            H[:] = 0
+
+    return ln_g, visited, counts, absM_sums
+
+# Glue the windows together by matching ln g over the shared levels
+def join_windows(pieces):
+    ln_g, visited, counts, absM_sums = (np.array(a, dtype=float) for a in pieces[0])
+    visited = visited.astype(bool)
+    ln_g[~visited] = -np.inf
+
+    for ln_g_k, visited_k, counts_k, absM_k in pieces[1:]:
+        shared = np.flatnonzero(visited & visited_k)
+        if shared.size == 0:
+            raise RuntimeError("neighbouring Wang-Landau windows do not overlap")
+        shift = np.mean(ln_g[shared] - ln_g_k[shared])
+
+        # Left window up to the middle of the overlap, right window beyond it
+        split = shared[len(shared) // 2]
+        upper = np.flatnonzero(visited_k)
+        upper = upper[upper > split]
+        ln_g[upper] = ln_g_k[upper] + shift
+        visited[upper] = True
+        counts += counts_k
+        absM_sums += absM_k
+
+    return ln_g, visited, counts, absM_sums
+
+def density_of_states(L=L, n_windows=n_windows, ln_f_final=ln_f_final, processes=None, seed=ising.seed):
+    """
+    Estimates ln g(E) for the L x L lattice, with the energy range split into
+    n_windows overlapping windows that run in parallel processes. Normalized
+    so that g(ground state) = 2.
+
+    Returns: (E_levels, ln_g, absM_per_level) for the visited levels only
+    """
+    windows = energy_windows(L, n_windows) if n_windows > 1 else [(0, L * L)]
+    seed = resolve_seed(seed)
+    jobs = [(L, lo, hi, ln_f_final, seed, k) for k, (lo, hi) in enumerate(windows)]
+
+    with Pool(processes or min(len(jobs), cpu_count())) as pool:
+        pieces = pool.map(wang_landau_window, jobs)
+
+    ln_g, visited, counts, absM_sums = join_windows(pieces)
+    E_levels = level_energies(L)[visited]
+    ln_g = ln_g[visited] - ln_g[visited][0] + np.log(2.0)
+    absM_per_level = absM_sums[visited] / np.maximum(counts[visited], 1)
+
+    return E_levels, ln_g, absM_per_level
+
+# Free energy, entropy and internal energy per spin at any temperature
+def thermodynamics(T_range, E_levels, ln_g, L=L):
+    T_range = np.asarray(T_range, dtype=float)
+    log_w = ln_g[None, :] - np.outer(1.0 / (ising.kB * T_range), E_levels)
+    ln_Z = logsumexp(log_w, axis=1)
+    U = np.exp(log_w - ln_Z[:, None]) @ E_levels
+    F = -ising.kB * T_range * ln_Z
+    S = (U - F) / T_range
+    N = L * L
+    return F / N, S / N, U / N
+
+# Main execution
+if __name__ == "__main__":
+    E_levels, ln_g, absM_per_level = density_of_states()
+
+    temperatures = np.linspace(ising.T_min, ising.T_max, 400)
+    magnetizations, energies, specific_heat = reweight(temperatures, ln_g, E_levels, absM_per_level, L=L)
+    free_energy, entropy, _ = thermodynamics(temperatures, E_levels, ln_g)
+
+    peak = np.argmax(specific_heat)
+    print(f"ln g sum check: {logsumexp(ln_g):.3f} (exact ln 2^N = {L * L * np.log(2):.3f})")
+    print(f"C_v peak: {specific_heat[peak]:.4f} at T = {temperatures[peak]:.4f}")